@@ -0,0 +1,69 @@
+import time
+import numpy as np
+
+DEBUG = 10
+INFO = 20
+QUIET = 30
+
+
+class Telemetry:
+    """
+    per-episode aggregates (steps, return, wall time, updates) kept in a preallocated ring buffer
+    of the last `capacity` episodes; every `sample_every`-th episode is also handed to the sinks,
+    callables taking the episode record as a dict
+    per-step messages go through debug(), which formats and prints only when level is DEBUG
+    """
+
+    def __init__(self, capacity=1024, level=INFO, sample_every=1, sinks=()):
+        self.capacity = capacity
+        self.level = level
+        self.sample_every = sample_every
+        self.sinks = list(sinks)
+
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.returns = np.zeros(capacity)
+        self.wall = np.zeros(capacity)
+        self.updates = np.zeros(capacity, dtype=np.int64)
+        self.episodes = 0  # episodes recorded so far
+        self.start = time.perf_counter()
+
+    def debug(self, msg, *args):
+        if self.level <= DEBUG:
+            print(msg.format(*args))
+
+    def startEpisode(self):
+        self.start = time.perf_counter()
+
+    def endEpisode(self, steps, ret, updates=0):
+        wall = time.perf_counter() - self.start
+        i = self.episodes % self.capacity
+        self.steps[i] = steps
+        self.returns[i] = ret
+        self.wall[i] = wall
+        self.updates[i] = updates
+        self.episodes += 1
+        if self.sinks and self.episodes % self.sample_every == 0:
+            record = {"episode": self.episodes - 1, "steps": steps, "return": ret, "wall": wall, "updates": updates}
+            for sink in self.sinks:
+                sink(record)
+        self.startEpisode()
+
+    def recent(self):
+        # recorded episodes still in the buffer, oldest first
+        n = min(self.episodes, self.capacity)
+        order = (np.arange(self.episodes - n, self.episodes)) % self.capacity
+        return {"steps": self.steps[order], "return": self.returns[order],
+                "wall": self.wall[order], "updates": self.updates[order]}
+
+
+def printSink(record):
+    print("episode {episode} | steps {steps} | return {return:.3f} | {wall:.4f}s | updates {updates}".format(**record))
+
+
+class ListSink:
+    # keeps every record it is given
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
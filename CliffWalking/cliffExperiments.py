@@ -0,0 +1,92 @@
+import itertools
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from cliffWalking import Agent
+from Telemetry import Telemetry
+
+
+class Welford:
+    # streaming mean and variance of equally shaped arrays, memory does not grow with the count
+    def __init__(self, shape):
+        self.n = 0
+        self.mean = np.zeros(shape)
+        self.M2 = np.zeros(shape)
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.M2 += delta * (x - self.mean)
+
+    def variance(self):
+        return self.M2 / (self.n - 1) if self.n > 1 else np.zeros_like(self.M2)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+
+def runJob(job):
+    # one training run, returns per-episode return and path length
+    algorithm, seed, exp_rate, lr, rounds = job
+    np.random.seed(seed)
+    ag = Agent(exp_rate=exp_rate, lr=lr, sarsa=(algorithm == "sarsa"), telemetry=Telemetry(capacity=rounds))
+    ag.play(rounds)
+    record = ag.telemetry.recent()
+    return job, record["return"], record["steps"]
+
+
+class CliffExperiment:
+    """
+    every combination of algorithm ("sarsa" / "q-learning"), seed, exp_rate and lr is trained on a process pool;
+    per-episode returns and path lengths are folded into Welford accumulators per (algorithm, exp_rate, lr)
+    as results arrive, so memory stays constant however many seeds are run
+    """
+
+    def __init__(self, seeds=range(20), exp_rates=(0.1,), lrs=(0.1,), algorithms=("sarsa", "q-learning"),
+                 rounds=500, workers=None):
+        self.seeds = seeds
+        self.exp_rates = exp_rates
+        self.lrs = lrs
+        self.algorithms = algorithms
+        self.rounds = rounds
+        self.workers = cpu_count() if workers is None else workers
+        self.returns = {}  # (algorithm, exp_rate, lr) -> Welford over episodes
+        self.lengths = {}
+
+    def jobs(self):
+        for algorithm, exp_rate, lr, seed in itertools.product(self.algorithms, self.exp_rates, self.lrs, self.seeds):
+            yield algorithm, seed, exp_rate, lr, self.rounds
+
+    def run(self):
+        with Pool(self.workers) as pool:
+            for (algorithm, _, exp_rate, lr, _), returns, lengths in pool.imap_unordered(runJob, self.jobs()):
+                key = (algorithm, exp_rate, lr)
+                if key not in self.returns:
+                    self.returns[key] = Welford(self.rounds)
+                    self.lengths[key] = Welford(self.rounds)
+                self.returns[key].update(returns)
+                self.lengths[key].update(lengths)
+
+    def show(self, last=100):
+        for key in sorted(self.returns):
+            returns, lengths = self.returns[key], self.lengths[key]
+            print("{} exp_rate={} lr={} | seeds {} | return over last {} episodes {:.1f} (std {:.1f}) | path length {:.1f}".format(
+                *key, returns.n, last, returns.mean[-last:].mean(), returns.std()[-last:].mean(),
+                lengths.mean[-last:].mean()))
+
+
+if __name__ == "__main__":
+    experiment = CliffExperiment(seeds=range(20), rounds=500)
+    experiment.run()
+    experiment.show()
+
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=[10, 6])
+    for key, stats in sorted(experiment.returns.items()):
+        plt.plot(stats.mean, label="{} exp_rate={} lr={}".format(*key))
+    plt.ylim(-100, 0)
+    plt.xlabel("episode")
+    plt.ylabel("mean return")
+    plt.legend()
+    plt.show()
@@ -1,20 +1,48 @@
 import numpy as np
+from TabularMDP import TabularMDP
+from QTable import QTable, SparseQTable
+from Telemetry import Telemetry, printSink
 
 
 ROWS = 4
 COLS = 12
 S = (3, 0)
 G = (3, 11)
+# shared default for a Cliff built without telemetry, it only ever receives debug messages
+SILENT = Telemetry(capacity=1)
+# board cells
+FREE = 0
+CLIFF = -1
+OBSTACLE = -2
+
+
+class World:
+    # layout of a cliff world, board is shared by every Cliff on it and never modified
+    def __init__(self, board, start, goal):
+        self.board = board
+        self.rows, self.cols = board.shape
+        self.start = start
+        self.goal = goal
+
+
+def defaultWorld():
+    board = np.zeros([ROWS, COLS], dtype=np.int8)
+    # add cliff marked as -1
+    board[3, 1:11] = CLIFF
+    return World(board, S, G)
 
 
 class Cliff:
 
-    def __init__(self):
+    def __init__(self, telemetry=None, world=None):
+        self.telemetry = SILENT if telemetry is None else telemetry
+        self.world = defaultWorld() if world is None else world
+        self.rows = self.world.rows
+        self.cols = self.world.cols
+        self.goal = self.world.goal
         self.end = False
-        self.pos = S
-        self.board = np.zeros([4, 12])
-        # add cliff marked as -1
-        self.board[3, 1:11] = -1
+        self.pos = self.world.start
+        self.board = self.world.board
 
     def nxtPosition(self, action):
         if action == "up":
@@ -26,85 +54,98 @@ class Cliff:
         else:
             nxtPos = (self.pos[0], self.pos[1] + 1)
         # check legitimacy
-        if nxtPos[0] >= 0 and nxtPos[0] <= 3:
-            if nxtPos[1] >= 0 and nxtPos[1] <= 11:
-                self.pos = nxtPos
+        if nxtPos[0] >= 0 and nxtPos[0] <= self.rows - 1:
+            if nxtPos[1] >= 0 and nxtPos[1] <= self.cols - 1:
+                if self.board[nxtPos] != OBSTACLE:
+                    self.pos = nxtPos
 
-        if self.pos == G:
+        if self.pos == self.goal:
             self.end = True
-            print("Game ends reaching goal")
-        if self.board[self.pos] == -1:
+            self.telemetry.debug("Game ends reaching goal")
+        if self.board[self.pos] == CLIFF:
             self.end = True
-            print("Game ends falling off cliff")
+            self.telemetry.debug("Game ends falling off cliff")
 
         return self.pos
 
     def giveReward(self):
         # give reward
-        if self.pos == G:
+        if self.pos == self.goal:
             return -1
-        if self.board[self.pos] == 0:
+        if self.board[self.pos] == FREE:
             return -1
         return -100
 
     def show(self):
-        for i in range(0, ROWS):
-            print('-------------------------------------------------')
+        for i in range(0, self.rows):
+            print('----' * self.cols + '-')
             out = '| '
-            for j in range(0, COLS):
-                if self.board[i, j] == -1:
+            for j in range(0, self.cols):
+                if self.board[i, j] == CLIFF:
                     token = '*'
-                if self.board[i, j] == 0:
+                if self.board[i, j] == OBSTACLE:
+                    token = 'z'
+                if self.board[i, j] == FREE:
                     token = '0'
                 if (i, j) == self.pos:
                     token = 'S'
-                if (i, j) == G:
+                if (i, j) == self.goal:
                     token = 'G'
                 out += token + ' | '
             print(out)
-        print('-------------------------------------------------')
+        print('----' * self.cols + '-')
+
+
+def compileMDP():
+    # Cliff dynamics as integer-id arrays, reward is what giveReward returns after the move
+    def transition(position, action):
+        cliff = Cliff()
+        cliff.pos = position
+        nxt = cliff.nxtPosition(action)
+        return nxt, cliff.giveReward()
+
+    board = Cliff().board
+    positions = [(i, j) for i in range(ROWS) for j in range(COLS)]
+    return TabularMDP.compile(positions, ["up", "left", "right", "down"], transition,
+                              lambda p: p == G or board[p] == -1, S)
 
 
 class Agent:
-    def __init__(self, exp_rate=0.3, lr=0.1, sarsa=True):
-        self.cliff = Cliff()
+    def __init__(self, exp_rate=0.3, lr=0.1, sarsa=True, telemetry=None, world=None, sparse=False):
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+        self.world = defaultWorld() if world is None else world
+        self.cliff = Cliff(self.telemetry, self.world)
         self.actions = ["up", "left", "right", "down"]
         self.states = []  # record position and action of each episode
-        self.pos = S
+        self.pos = self.world.start
         self.exp_rate = exp_rate
         self.lr = lr
         self.sarsa = sarsa
-        self.state_actions = {}
-        for i in range(ROWS):
-            for j in range(COLS):
-                self.state_actions[(i, j)] = {}
-                for a in self.actions:
-                    self.state_actions[(i, j)][a] = 0
+        if sparse:
+            # only states the agent visits get a row, for large worlds
+            self.state_actions = SparseQTable(self.actions)
+        else:
+            self.state_actions = QTable([(i, j) for i in range(self.world.rows) for j in range(self.world.cols)],
+                                        self.actions)
 
     def chooseAction(self):
         # epsilon-greedy
-        mx_nxt_reward = -999
-        action = ""
-
         if np.random.uniform(0, 1) <= self.exp_rate:
             action = np.random.choice(self.actions)
         else:
-            # greedy action
-            for a in self.actions:
-                current_position = self.pos
-                nxt_reward = self.state_actions[current_position][a]
-                if nxt_reward >= mx_nxt_reward:
-                    action = a
-                    mx_nxt_reward = nxt_reward
+            # greedy action, ties broken at random
+            action = self.state_actions.greedy(self.pos)
         return action
 
     def reset(self):
         self.states = []
-        self.cliff = Cliff()
-        self.pos = S
+        self.cliff = Cliff(self.telemetry, self.world)
+        self.pos = self.world.start
 
     def play(self, rounds=10):
         for _ in range(rounds):
+            self.telemetry.startEpisode()
+            ep_return = 0
             while 1:
                 curr_state = self.pos
                 cur_reward = self.cliff.giveReward()
@@ -113,13 +154,14 @@ class Agent:
                 # next position
                 self.cliff.pos = self.cliff.nxtPosition(action)
                 self.pos = self.cliff.pos
+                ep_return += self.cliff.giveReward()
 
                 self.states.append([curr_state, action, cur_reward])
                 if self.cliff.end:
                     break
             # game end update estimates
             reward = self.cliff.giveReward()
-            print("End game reward", reward)
+            self.telemetry.debug("End game reward {}", reward)
             # reward of all actions in end state is same
             for a in self.actions:
                 self.state_actions[self.pos][a] = reward
@@ -137,8 +179,9 @@ class Agent:
                     reward = current_value + self.lr * (r + reward - current_value)
                     self.state_actions[pos][action] = round(reward, 3)
                     # update using the max value of S'
-                    reward = np.max(list(self.state_actions[pos].values()))  # max
+                    reward = self.state_actions.max(pos)  # max
 
+            self.telemetry.endEpisode(len(self.states), ep_return, len(self.states))
             self.reset()
 
 
@@ -164,7 +207,7 @@ def showRoute(states):
 
 if __name__ == "__main__":
     print("sarsa training ... ")
-    ag = Agent(exp_rate=0.1, sarsa=True)
+    ag = Agent(exp_rate=0.1, sarsa=True, telemetry=Telemetry(sample_every=100, sinks=[printSink]))
     ag.play(rounds=500)
 
     # Sarsa
@@ -188,7 +231,7 @@ if __name__ == "__main__":
     showRoute(states)
 
     print("q-learning training ... ")
-    ag = Agent(exp_rate=0.1, sarsa=False)
+    ag = Agent(exp_rate=0.1, sarsa=False, telemetry=Telemetry(sample_every=100, sinks=[printSink]))
     ag.play(rounds=500)
 
     # Q-learning
@@ -0,0 +1,49 @@
+import time
+import numpy as np
+from cliffWalking import Agent, World, FREE, CLIFF, OBSTACLE
+
+
+def generateWorld(rows, cols, cliff_density=0.05, obstacle_density=0.1, cliff_edge=True, seed=None):
+    """
+    random cliff world: start bottom left, goal bottom right, as in the 4 x 12 original
+    cells are cliff / obstacle with the given densities; with cliff_edge the bottom row between start
+    and goal is a cliff as in the book; one path from start to goal (up a random column, along a random
+    row, down the goal column) is always kept free so the goal is reachable
+    """
+    rng = np.random.RandomState(seed)
+    u = rng.uniform(0, 1, (rows, cols))
+    board = np.full((rows, cols), FREE, dtype=np.int8)
+    board[u < cliff_density] = CLIFF
+    board[(u >= cliff_density) & (u < cliff_density + obstacle_density)] = OBSTACLE
+
+    start = (rows - 1, 0)
+    goal = (rows - 1, cols - 1)
+    if cliff_edge and cols > 2:
+        board[rows - 1, 1:cols - 1] = CLIFF
+
+    # keep a path free
+    detour_row = rng.randint(0, rows - 1) if rows > 1 else 0
+    board[detour_row:, 0] = FREE
+    board[detour_row, :] = FREE
+    board[detour_row:, cols - 1] = FREE
+    board[start] = FREE
+    board[goal] = FREE
+    return World(board, start, goal)
+
+
+def denseQBytes(world, n_actions=4):
+    # what a dense QTable over every cell would need for its Q array alone
+    return world.rows * world.cols * n_actions * 8
+
+
+if __name__ == "__main__":
+    for size in [12, 100, 1000]:
+        world = generateWorld(size, size, seed=0)
+        start = time.time()
+        ag = Agent(exp_rate=0.1, sarsa=False, world=world, sparse=True)
+        ag.play(rounds=200)
+        elapsed = time.time() - start
+        steps = ag.telemetry.recent()["steps"]
+        print("{0}x{0} | {1:.2f}s | {2} steps | visited states {3} | sparse Q {4:.2f} MB | dense Q array {5:.2f} MB".format(
+            size, elapsed, steps.sum(), len(ag.state_actions), ag.state_actions.memoryBytes() / 1e6,
+            denseQBytes(world) / 1e6))
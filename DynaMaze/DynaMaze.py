@@ -1,5 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from TabularMDP import TabularMDP
+from QTable import QTable
+from MazeLayout import MazeLayout
+from ModelStore import ModelStore
+from Telemetry import Telemetry, printSink
 
 ROWS = 6
 COLS = 9
@@ -7,22 +12,22 @@ S = (2, 0)
 G = (0, 8)
 BLOCKS = [(1, 2), (2, 2), (3, 2), (0, 7), (1, 7), (2, 7), (4, 5)]
 ACTIONS = ["left", "up", "right", "down"]
+LAYOUT = MazeLayout.fromBlocks(ROWS, COLS, BLOCKS, S, G)
 
 
 class Maze:
     
-    def __init__(self):
-        self.rows = ROWS
-        self.cols = COLS
-        self.start = S
-        self.goal = G
-        self.blocks = BLOCKS
-        self.state = S
+    def __init__(self, layout=None):
+        self.layout = LAYOUT if layout is None else layout
+        self.rows = self.layout.rows
+        self.cols = self.layout.cols
+        self.start = self.layout.start
+        self.goal = self.layout.goal
+        self.walls = self.layout.walls
+        self.state = self.start
         self.end = False
-        # init maze
-        self.maze = np.zeros((self.rows, self.cols))
-        for b in self.blocks:
-            self.maze[b] = -1
+        # board for showMaze, drawn on first use
+        self.maze = None
             
     def nxtPosition(self, action):
         r, c = self.state
@@ -36,7 +41,7 @@ class Maze:
             r += 1
         
         if (r >= 0 and r <= self.rows-1) and (c >= 0 and c <= self.cols-1):
-            if (r, c) not in self.blocks:
+            if not self.walls[r, c]:
                 self.state = (r, c)
         return self.state
     
@@ -48,6 +53,8 @@ class Maze:
             return 0
         
     def showMaze(self):
+        if self.maze is None:
+            self.maze = np.where(self.walls, -1, 0)
         self.maze[self.state] = 1
         for i in range(0, self.rows):
             print('-------------------------------------')
@@ -64,11 +71,47 @@ class Maze:
         print('-------------------------------------')
 
 
+def compileMDP(layout=None):
+    # Maze dynamics as integer-id arrays
+    layout = LAYOUT if layout is None else layout
+
+    def transition(position, action):
+        maze = Maze(layout)
+        maze.state = position
+        nxt = maze.nxtPosition(action)
+        return nxt, maze.giveReward()
+
+    return TabularMDP.compile(layout.positions(), ACTIONS, transition, lambda p: p == layout.goal, layout.start)
+
+
+def batchUpdate(q, lr, states, actions, targets, duplicates="sequential"):
+    # move q[states, actions] toward targets with one array update per distinct pair
+    _, first, inverse, counts = np.unique(states * q.shape[1] + actions, return_index=True,
+                                          return_inverse=True, return_counts=True)
+    s, a = states[first], actions[first]
+    if duplicates == "sequential":
+        # what `count` updates of a pair toward the same target would give one after another
+        q[s, a] = targets[first] + (1 - lr)**counts * (q[s, a] - targets[first])
+    else:
+        # "average": one update toward the mean target of the pair's samples
+        q[s, a] += lr*(np.bincount(inverse.ravel(), targets) / counts - q[s, a])
+
+
 class DynaAgent:
-    
-    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1):
-        self.maze = Maze()
-        self.state = S
+    """
+    planning: "loop" updates the n_steps sampled pairs one after another, "sequential" and "average" do them
+    as one batch against the Q values from before it; a pair drawn several times is moved as if updated that
+    many times in a row ("sequential") or once toward its mean target ("average")
+    """
+
+    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1, telemetry=None, planning="loop", layout=None, max_steps=None):
+        if planning not in ["loop", "sequential", "average"]:
+            raise ValueError("unknown planning mode {}".format(planning))
+        self.planning = planning
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+        self.layout = LAYOUT if layout is None else layout
+        self.maze = Maze(self.layout)
+        self.state = self.layout.start
         self.actions = ACTIONS
         self.state_actions = []  # state & action track
         self.exp_rate = exp_rate
@@ -76,48 +119,47 @@ class DynaAgent:
         
         self.steps = n_steps
         self.episodes = episodes  # number of episodes going to play
+        self.max_steps = max_steps  # cut an episode off after this many real steps, None for no limit
+        self.planning_updates = 0  # model updates made by planning, over every episode played
         self.steps_per_episode = []
         
-        self.Q_values = {}
-        # model function
-        self.model = {}
-        for row in range(ROWS):
-            for col in range(COLS):
-                self.Q_values[(row, col)] = {}
-                for a in self.actions:
-                    self.Q_values[(row, col)][a] = 0
+        self.Q_values = QTable(self.layout.positions(), self.actions)
+        # model function, over the Q table's state and action ids
+        self.model = ModelStore(len(self.Q_values.states), len(self.actions))
         
     def chooseAction(self):
         # epsilon-greedy
-        mx_nxt_reward = -999
-        action = ""
-        
         if np.random.uniform(0, 1) <= self.exp_rate:
             action = np.random.choice(self.actions)
         else:
-            # greedy action
-            current_position = self.state
-            # if all actions have same value, then select randomly
-            if len(set(self.Q_values[current_position].values())) == 1:
-                action = np.random.choice(self.actions)
-            else:
-                for a in self.actions:
-                    nxt_reward = self.Q_values[current_position][a]
-                    if nxt_reward >= mx_nxt_reward:
-                        action = a
-                        mx_nxt_reward = nxt_reward
+            # greedy action, if several actions have the same value select randomly among them
+            action = self.Q_values.greedy(self.state)
         return action
     
     def reset(self):
-        self.maze = Maze()
-        self.state = S
+        self.maze = Maze(self.layout)
+        self.state = self.layout.start
         self.state_actions = []
+
+    def plan(self):
+        q = self.Q_values.array
+        _states, _actions, _rewards, _nxtStates, _ = self.model.sample(self.steps)
+        if self.planning == "loop":
+            for _s, _a, _reward, _nxt in zip(_states.tolist(), _actions.tolist(), _rewards.tolist(), _nxtStates.tolist()):
+                q[_s, _a] += self.lr*(_reward + q[_nxt].max() - q[_s, _a])
+            return self.steps
+
+        # batched: every target from the Q values before this batch
+        batchUpdate(q, self.lr, _states, _actions, _rewards + q[_nxtStates].max(axis=1), self.planning)
+        return self.steps
     
     def play(self):
         self.steps_per_episode = []  
         
-        for ep in range(self.episodes):    
-            while not self.maze.end:
+        for ep in range(self.episodes):
+            self.telemetry.startEpisode()
+            updates = 0
+            while not self.maze.end and (self.max_steps is None or len(self.state_actions) < self.max_steps):
 
                 action = self.chooseAction()
                 self.state_actions.append((self.state, action))
@@ -125,29 +167,21 @@ class DynaAgent:
                 nxtState = self.maze.nxtPosition(action)
                 reward = self.maze.giveReward()
                 # update Q-value
-                self.Q_values[self.state][action] += self.lr*(reward + np.max(list(self.Q_values[nxtState].values())) - self.Q_values[self.state][action])
+                updates += 1
+                self.Q_values[self.state][action] += self.lr*(reward + self.Q_values.max(nxtState) - self.Q_values[self.state][action])
 
                 # update model
-                if self.state not in self.model.keys():
-                    self.model[self.state] = {}
-                self.model[self.state][action] = (reward, nxtState)
+                index = self.Q_values.state_index
+                self.model.add(index[self.state], self.Q_values.action_index[action], reward, index[nxtState])
                 self.state = nxtState
 
-                # loop n times to randomly update Q-value
-                for _ in range(self.steps):
-                    # randomly choose an state
-                    rand_idx = np.random.choice(range(len(self.model.keys())))
-                    _state = list(self.model)[rand_idx]
-                    # randomly choose an action
-                    rand_idx = np.random.choice(range(len(self.model[_state].keys())))
-                    _action = list(self.model[_state])[rand_idx]
-
-                    _reward, _nxtState = self.model[_state][_action]
-
-                    self.Q_values[_state][_action] += self.lr*(_reward + np.max(list(self.Q_values[_nxtState].values())) - self.Q_values[_state][_action])       
+                # n planning updates on remembered (state, action) pairs drawn uniformly at random
+                if self.steps > 0:
+                    planned = self.plan()
+                    updates += planned
+                    self.planning_updates += planned
             # end of game
-            if ep % 10 == 0:
-                print("episode", ep)
+            self.telemetry.endEpisode(len(self.state_actions), reward, updates)
             self.steps_per_episode.append(len(self.state_actions))
             self.reset()
 
@@ -155,17 +189,17 @@ class DynaAgent:
 if __name__ == "__main__":
     N_EPISODES = 50
     # comparison
-    agent = DynaAgent(n_steps=0, episodes=N_EPISODES)
+    agent = DynaAgent(n_steps=0, episodes=N_EPISODES, telemetry=Telemetry(sample_every=10, sinks=[printSink]))
     agent.play()
 
     steps_episode_0 = agent.steps_per_episode
 
-    agent = DynaAgent(n_steps=5, episodes=N_EPISODES)
+    agent = DynaAgent(n_steps=5, episodes=N_EPISODES, telemetry=Telemetry(sample_every=10, sinks=[printSink]))
     agent.play()
 
     steps_episode_5 = agent.steps_per_episode
 
-    agent = DynaAgent(n_steps=50, episodes=N_EPISODES)
+    agent = DynaAgent(n_steps=50, episodes=N_EPISODES, telemetry=Telemetry(sample_every=10, sinks=[printSink]))
     agent.play()
 
     steps_episode_50 = agent.steps_per_episode
@@ -1,4 +1,8 @@
 import numpy as np
+from QTable import QTable
+from MazeLayout import MazeLayout
+from ModelStore import ModelStore
+from Telemetry import Telemetry, printSink
 
 ROWS = 6
 COLS = 9
@@ -6,22 +10,22 @@ S = (2, 0)
 G = (0, 8)
 BLOCKS = [(1, 2), (2, 2), (3, 2), (0, 7), (1, 7), (2, 7), (4, 5)]
 ACTIONS = ["left", "up", "right", "down"]
+LAYOUT = MazeLayout.fromBlocks(ROWS, COLS, BLOCKS, S, G)
 
 
 class Maze:
 
-    def __init__(self):
-        self.rows = ROWS
-        self.cols = COLS
-        self.start = S
-        self.goal = G
-        self.blocks = BLOCKS
-        self.state = S
+    def __init__(self, layout=None):
+        self.layout = LAYOUT if layout is None else layout
+        self.rows = self.layout.rows
+        self.cols = self.layout.cols
+        self.start = self.layout.start
+        self.goal = self.layout.goal
+        self.walls = self.layout.walls
+        self.state = self.start
         self.end = False
-        # init maze
-        self.maze = np.zeros((self.rows, self.cols))
-        for b in self.blocks:
-            self.maze[b] = -1
+        # board for showMaze, drawn on first use
+        self.maze = None
 
     def nxtPosition(self, action):
         r, c = self.state
@@ -35,7 +39,7 @@ class Maze:
             r += 1
 
         if (r >= 0 and r <= self.rows - 1) and (c >= 0 and c <= self.cols - 1):
-            if (r, c) not in self.blocks:
+            if not self.walls[r, c]:
                 self.state = (r, c)
         return self.state
 
@@ -47,6 +51,8 @@ class Maze:
             return 0
 
     def showMaze(self):
+        if self.maze is None:
+            self.maze = np.where(self.walls, -1, 0)
         self.maze[self.state] = 1
         for i in range(0, self.rows):
             print('-------------------------------------')
@@ -65,11 +71,13 @@ class Maze:
 
 class DynaAgentPlus:
 
-    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1, timeWeight=1e-4):
-        self.time = 0  # keep track of the total time
+    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1, timeWeight=1e-4, telemetry=None, layout=None, max_steps=None):
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+        self.layout = LAYOUT if layout is None else layout
+        self.time = 0  # keep track of the total time, over every episode
         self.timeWeight = timeWeight
-        self.maze = Maze()
-        self.state = S
+        self.maze = Maze(self.layout)
+        self.state = self.layout.start
         self.actions = ACTIONS
         self.state_actions = []  # state & action track
         self.exp_rate = exp_rate
@@ -77,60 +85,47 @@ class DynaAgentPlus:
 
         self.steps = n_steps
         self.episodes = episodes  # number of episodes going to play
+        self.max_steps = max_steps  # cut an episode off after this many real steps, None for no limit
+        self.planning_updates = 0  # model updates made by planning, over every episode played
         self.steps_per_episode = []
 
-        self.Q_values = {}
-        # model function
-        self.model = {}
-        for row in range(ROWS):
-            for col in range(COLS):
-                self.Q_values[(row, col)] = {}
-                for a in self.actions:
-                    self.Q_values[(row, col)][a] = 0
+        self.Q_values = QTable(self.layout.positions(), self.actions)
+        # model function, over the Q table's state and action ids
+        self.model = ModelStore(len(self.Q_values.states), len(self.actions))
 
     def chooseAction(self):
         # epsilon-greedy
-        mx_nxt_reward = -999
-        action = ""
-
         if np.random.uniform(0, 1) <= self.exp_rate:
             action = np.random.choice(self.actions)
         else:
-            # greedy action
-            current_position = self.state
-            # if all actions have same value, then select randomly
-            if len(set(self.Q_values[current_position].values())) == 1:
-                action = np.random.choice(self.actions)
-            else:
-                for a in self.actions:
-                    nxt_reward = self.Q_values[current_position][a]
-                    if nxt_reward >= mx_nxt_reward:
-                        action = a
-                        mx_nxt_reward = nxt_reward
+            # greedy action, if several actions have the same value select randomly among them
+            action = self.Q_values.greedy(self.state)
         return action
 
     def reset(self):
-        self.maze = Maze()
-        self.state = S
+        self.maze = Maze(self.layout)
+        self.state = self.layout.start
         self.state_actions = []
-        self.time = 0
+        # time keeps running across episodes, the model's last-tried stamps are on the same clock
 
     def updateModel(self, state, nxtState, action, reward):
-        if state not in self.model.keys():
-            self.model[state] = {}
-        for a in self.actions:
+        s = self.Q_values.state_index[state]
+        a = self.Q_values.action_index[action]
+        for other in range(len(self.actions)):
             # the initial model for such actions was that they would
             # lead back to the same state with a reward of 0.
-            if a != action:
-                self.model[state][a] = (0, state, 1)
+            if other != a:
+                self.model.add(s, other, 0, s, 1)
 
-        self.model[state][action] = (reward, nxtState, self.time)
+        self.model.add(s, a, reward, self.Q_values.state_index[nxtState], self.time)
 
     def play(self):
         self.steps_per_episode = []
 
         for ep in range(self.episodes):
-            while not self.maze.end:
+            self.telemetry.startEpisode()
+            updates = 0
+            while not self.maze.end and (self.max_steps is None or len(self.state_actions) < self.max_steps):
 
                 action = self.chooseAction()
                 self.state_actions.append((self.state, action))
@@ -139,34 +134,30 @@ class DynaAgentPlus:
                 reward = self.maze.giveReward()
 
                 # update Q-value
-                self.Q_values[self.state][action] += self.lr * (reward + np.max(list(self.Q_values[nxtState].values())) - self.Q_values[self.state][action])
+                updates += 1
+                self.Q_values[self.state][action] += self.lr * (reward + self.Q_values.max(nxtState) - self.Q_values[self.state][action])
 
                 # update model
                 self.updateModel(self.state, nxtState, action, reward)
                 self.state = nxtState
                 self.time += 1
 
-                # loop n times to randomly update Q-value
-                for _ in range(self.steps):
-                    # randomly choose an state
-                    rand_idx = np.random.choice(range(len(self.model.keys())))
-                    _state = list(self.model)[rand_idx]
-                    # randomly choose an action
-                    rand_idx = np.random.choice(range(len(self.model[_state].keys())))
-                    _action = list(self.model[_state])[rand_idx]
-
-                    _reward, _nxtState, _time = self.model[_state][_action]
+                # n planning updates on remembered (state, action) pairs drawn uniformly at random
+                if self.steps > 0:
+                    q = self.Q_values.array
+                    _states, _actions, _rewards, _nxtStates, _times = self.model.sample(self.steps)
                     # update _reward
-                    _reward += self.timeWeight * np.sqrt(self.time - _time)
-
-                    self.Q_values[_state][_action] += self.lr * (_reward + np.max(list(self.Q_values[_nxtState].values())) - self.Q_values[_state][_action])
+                    _rewards = _rewards + self.timeWeight * np.sqrt(self.time - _times)
+                    for _s, _a, _reward, _nxt in zip(_states.tolist(), _actions.tolist(), _rewards.tolist(), _nxtStates.tolist()):
+                        updates += 1
+                        self.planning_updates += 1
+                        q[_s, _a] += self.lr * (_reward + q[_nxt].max() - q[_s, _a])
             # end of game
-            if ep % 10 == 0:
-                print("episode", ep)
+            self.telemetry.endEpisode(len(self.state_actions), reward, updates)
             self.steps_per_episode.append(len(self.state_actions))
             self.reset()
 
 
 if __name__ == "__main__":
-    dap = DynaAgentPlus()
+    dap = DynaAgentPlus(telemetry=Telemetry(sinks=[printSink]))
     dap.play()
\ No newline at end of file
@@ -0,0 +1,80 @@
+class IndexedHeap:
+    """
+    binary max-heap holding each item once, with its position kept in a dict
+    heap[item] = priority inserts the item or moves it up or down to its new priority in O(log n),
+    so the heap never grows past the number of distinct items
+    """
+
+    def __init__(self):
+        self.items = []
+        self.priorities = []
+        self.position = {}  # item -> index in the heap
+
+    def __setitem__(self, item, priority):
+        i = self.position.get(item)
+        if i is None:
+            i = len(self.items)
+            self.items.append(item)
+            self.priorities.append(priority)
+            self.position[item] = i
+            self._siftUp(i)
+            return
+        old = self.priorities[i]
+        self.priorities[i] = priority
+        if priority > old:
+            self._siftUp(i)
+        else:
+            self._siftDown(i)
+
+    def __getitem__(self, item):
+        return self.priorities[self.position[item]]
+
+    def get(self, item, default=None):
+        i = self.position.get(item)
+        return default if i is None else self.priorities[i]
+
+    def pop(self):
+        # (item, priority) with the highest priority
+        item, priority = self.items[0], self.priorities[0]
+        last_item, last_priority = self.items.pop(), self.priorities.pop()
+        del self.position[item]
+        if self.items:
+            self.items[0], self.priorities[0] = last_item, last_priority
+            self.position[last_item] = 0
+            self._siftDown(0)
+        return item, priority
+
+    def peek(self):
+        return self.items[0], self.priorities[0]
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def __len__(self):
+        return len(self.items)
+
+    def _swap(self, i, j):
+        self.items[i], self.items[j] = self.items[j], self.items[i]
+        self.priorities[i], self.priorities[j] = self.priorities[j], self.priorities[i]
+        self.position[self.items[i]] = i
+        self.position[self.items[j]] = j
+
+    def _siftUp(self, i):
+        while i > 0:
+            parent = (i - 1) // 2
+            if self.priorities[i] <= self.priorities[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _siftDown(self, i):
+        n = len(self.items)
+        while True:
+            largest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self.priorities[child] > self.priorities[largest]:
+                    largest = child
+            if largest == i:
+                break
+            self._swap(i, largest)
+            i = largest
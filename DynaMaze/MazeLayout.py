@@ -0,0 +1,29 @@
+import numpy as np
+
+
+class MazeLayout:
+    """
+    size, walls, start and goal of a maze
+    walls is a (rows, cols) bool bitmap, so checking a cell is one lookup however many walls there are,
+    and every Maze built from the layout shares it instead of copying
+    """
+
+    def __init__(self, walls, start, goal):
+        self.walls = np.asarray(walls, dtype=bool)
+        self.rows, self.cols = self.walls.shape
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+
+    @classmethod
+    def fromBlocks(cls, rows, cols, blocks, start, goal):
+        walls = np.zeros((rows, cols), dtype=bool)
+        for b in blocks:
+            walls[b] = True
+        return cls(walls, start, goal)
+
+    def positions(self):
+        # every cell, walls included, row by row
+        return [(i, j) for i in range(self.rows) for j in range(self.cols)]
+
+    def freeCells(self):
+        return int((~self.walls).sum())
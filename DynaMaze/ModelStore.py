@@ -0,0 +1,62 @@
+import numpy as np
+
+
+class ModelStore:
+    """
+    Dyna model over integer state / action ids (e.g. a QTable's state_index and action_index)
+    every observed (state, action) pair owns one slot in dense arrays holding its reward, next state and
+    the time it was last seen; position[state, action] is the pair's slot or -1
+    insert, update and sampling a pair uniformly are O(1), sample(k) draws k pairs in one call
+    """
+
+    def __init__(self, n_states, n_actions, capacity=1024):
+        self.position = np.full((n_states, n_actions), -1, dtype=np.int64)
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.times = np.zeros(capacity)
+        self.size = 0
+
+    def _grow(self):
+        for name in ["states", "actions", "rewards", "next_states", "times"]:
+            old = getattr(self, name)
+            grown = np.zeros(2 * len(old), dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, state, action, reward, nxt, time=0):
+        # insert the pair, or overwrite what the model predicts for it
+        slot = self.position[state, action]
+        if slot < 0:
+            slot = self.size
+            if slot == len(self.states):
+                self._grow()
+            self.states[slot] = state
+            self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.next_states[slot] = nxt
+        self.times[slot] = time
+        if slot == self.size:
+            # publish the pair only once its slot is filled, a planner thread may be sampling meanwhile
+            self.position[state, action] = slot
+            self.size += 1
+
+    def get(self, state, action):
+        slot = self.position[state, action]
+        return self.rewards[slot], self.next_states[slot], self.times[slot]
+
+    def sample(self, k=None, rng=None):
+        """
+        (state, action, reward, next state, time) of a uniformly drawn observed pair
+        with k, the same as arrays of k pairs drawn with replacement; rng defaults to np.random
+        """
+        rng = np.random if rng is None else rng
+        slots = rng.randint(self.size, size=k)
+        return self.states[slots], self.actions[slots], self.rewards[slots], self.next_states[slots], self.times[slots]
+
+    def __contains__(self, pair):
+        return self.position[pair] >= 0
+
+    def __len__(self):
+        return self.size
@@ -1,5 +1,8 @@
-from queue import PriorityQueue
 import numpy as np
+from QTable import QTable
+from MazeLayout import MazeLayout
+from IndexedHeap import IndexedHeap
+from Telemetry import Telemetry, printSink
 
 ROWS = 6
 COLS = 9
@@ -7,22 +10,22 @@ S = (2, 0)
 G = (0, 8)
 BLOCKS = [(1, 2), (2, 2), (3, 2), (0, 7), (1, 7), (2, 7), (4, 5)]
 ACTIONS = ["left", "up", "right", "down"]
+LAYOUT = MazeLayout.fromBlocks(ROWS, COLS, BLOCKS, S, G)
 
 
 class Maze:
 
-    def __init__(self):
-        self.rows = ROWS
-        self.cols = COLS
-        self.start = S
-        self.goal = G
-        self.blocks = BLOCKS
-        self.state = S
+    def __init__(self, layout=None):
+        self.layout = LAYOUT if layout is None else layout
+        self.rows = self.layout.rows
+        self.cols = self.layout.cols
+        self.start = self.layout.start
+        self.goal = self.layout.goal
+        self.walls = self.layout.walls
+        self.state = self.start
         self.end = False
-        # init maze
-        self.maze = np.zeros((self.rows, self.cols))
-        for b in self.blocks:
-            self.maze[b] = -1
+        # board for showMaze, drawn on first use
+        self.maze = None
 
     def nxtPosition(self, action):
         r, c = self.state
@@ -36,7 +39,7 @@ class Maze:
             r += 1
 
         if (r >= 0 and r <= self.rows - 1) and (c >= 0 and c <= self.cols - 1):
-            if (r, c) not in self.blocks:
+            if not self.walls[r, c]:
                 self.state = (r, c)
         return self.state
 
@@ -48,6 +51,8 @@ class Maze:
             return 0
 
     def showMaze(self):
+        if self.maze is None:
+            self.maze = np.where(self.walls, -1, 0)
         self.maze[self.state] = 1
         for i in range(0, self.rows):
             print('-------------------------------------')
@@ -66,9 +71,11 @@ class Maze:
 
 class PriorityAgent:
 
-    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1, theta=0):
-        self.maze = Maze()
-        self.state = S
+    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1, theta=0, telemetry=None, layout=None, max_steps=None):
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+        self.layout = LAYOUT if layout is None else layout
+        self.maze = Maze(self.layout)
+        self.state = self.layout.start
         self.actions = ACTIONS
         self.state_actions = []  # state & action track
         self.exp_rate = exp_rate
@@ -76,51 +83,38 @@ class PriorityAgent:
 
         self.steps = n_steps
         self.episodes = episodes  # number of episodes going to play
+        self.max_steps = max_steps  # cut an episode off after this many real steps, None for no limit
+        self.planning_updates = 0  # model updates made by planning, over every episode played
         self.steps_per_episode = []
 
-        self.Q_values = {}
+        self.Q_values = QTable(self.layout.positions(), self.actions)
         # model function
         self.model = {}
-        for row in range(ROWS):
-            for col in range(COLS):
-                self.Q_values[(row, col)] = {}
-                for a in self.actions:
-                    self.Q_values[(row, col)][a] = 0
 
         # for priority sweeping
         self.theta = theta
-        self.queue = PriorityQueue()
-        self.predecessors = {}  # nxtState -> list[(curState, Action)...]
+        self.queue = IndexedHeap()  # (state, action) -> priority, one entry per pair
+        self.predecessors = {}  # nxtState -> {(curState, Action): None, ...}, a set that keeps insertion order
 
     def chooseAction(self):
         # epsilon-greedy
-        mx_nxt_reward = -999
-        action = ""
-
         if np.random.uniform(0, 1) <= self.exp_rate:
             action = np.random.choice(self.actions)
         else:
-            # greedy action
-            current_position = self.state
-            # if all actions have same value, then select randomly
-            if len(set(self.Q_values[current_position].values())) == 1:
-                action = np.random.choice(self.actions)
-            else:
-                for a in self.actions:
-                    nxt_reward = self.Q_values[current_position][a]
-                    if nxt_reward >= mx_nxt_reward:
-                        action = a
-                        mx_nxt_reward = nxt_reward
+            # greedy action, if several actions have the same value select randomly among them
+            action = self.Q_values.greedy(self.state)
         return action
 
     def reset(self):
-        self.maze = Maze()
-        self.state = S
+        self.maze = Maze(self.layout)
+        self.state = self.layout.start
         self.state_actions = []
 
     def play(self):
         for ep in range(self.episodes):
-            while not self.maze.end:
+            self.telemetry.startEpisode()
+            updates = 0
+            while not self.maze.end and (self.max_steps is None or len(self.state_actions) < self.max_steps):
 
                 action = self.chooseAction()
                 self.state_actions.append((self.state, action))
@@ -129,45 +123,41 @@ class PriorityAgent:
                 reward = self.maze.giveReward()
 
                 # update priority queue
-                tmp_diff = reward + np.max(list(self.Q_values[nxtState].values())) - self.Q_values[self.state][action]
+                tmp_diff = reward + self.Q_values.max(nxtState) - self.Q_values[self.state][action]
                 if tmp_diff > self.theta:
-                    self.queue.put((-tmp_diff, (self.state, action)))  # -diff -> (state, action) pop the smallest
+                    self.queue[(self.state, action)] = tmp_diff  # re-prioritizes the pair if already queued
 
                 # update model & predecessors
                 if self.state not in self.model.keys():
                     self.model[self.state] = {}
                 self.model[self.state][action] = (reward, nxtState)
-                if nxtState not in self.predecessors.keys():
-                    self.predecessors[nxtState] = [(self.state, action)]
-                else:
-                    self.predecessors[nxtState].append((self.state, action))
+                self.predecessors.setdefault(nxtState, {})[(self.state, action)] = None
                 self.state = nxtState
 
                 # loop n times to randomly update Q-value
                 for _ in range(self.steps):
-                    if self.queue.empty():
+                    if not self.queue:
                         break
-                    _state, _action = self.queue.get()[1]
+                    (_state, _action), _ = self.queue.pop()
                     _reward, _nxtState = self.model[_state][_action]
-                    self.Q_values[_state][_action] += self.lr * (_reward + np.max(list(self.Q_values[_nxtState].values())) - self.Q_values[_state][_action])
+                    updates += 1
+                    self.planning_updates += 1
+                    self.Q_values[_state][_action] += self.lr * (_reward + self.Q_values.max(_nxtState) - self.Q_values[_state][_action])
 
                     # loop for all state, action predicted lead to _state
                     if _state not in self.predecessors.keys():
                         continue
-                    pre_state_action_list = self.predecessors[_state]
-
-                    for (pre_state, pre_action) in pre_state_action_list:
+                    for (pre_state, pre_action) in self.predecessors[_state]:
                         pre_reward, _ = self.model[pre_state][pre_action]
-                        pre_tmp_diff = pre_reward + np.max(list(self.Q_values[_state].values())) - self.Q_values[pre_state][pre_action]
+                        pre_tmp_diff = pre_reward + self.Q_values.max(_state) - self.Q_values[pre_state][pre_action]
                         if pre_tmp_diff > self.theta:
-                            self.queue.put((-pre_tmp_diff, (pre_state, pre_action)))
+                            self.queue[(pre_state, pre_action)] = pre_tmp_diff
             # end of game
-            if ep % 10 == 0:
-                print("episode", ep)
+            self.telemetry.endEpisode(len(self.state_actions), reward, updates)
             self.steps_per_episode.append(len(self.state_actions))
             self.reset()
 
 
 if __name__ == "__main__":
-    pa = PriorityAgent()
+    pa = PriorityAgent(telemetry=Telemetry(sinks=[printSink]))
     pa.play()
\ No newline at end of file
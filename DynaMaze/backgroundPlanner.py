@@ -0,0 +1,122 @@
+import threading
+import time
+import numpy as np
+from DynaMaze import DynaAgent, batchUpdate
+from Telemetry import Telemetry, printSink
+
+
+class BackgroundPlanner:
+    """
+    Dyna planning apart from acting: draws `batch` remembered pairs at a time from a ModelStore and applies
+    them to a Q array with batchUpdate ("sequential" for pairs drawn more than once)
+    threaded, it plans continuously on its own thread between start() and stop(), at most updates_per_sec
+    (None runs flat out); nothing is locked, the acting loop reads and writes the same Q array as it goes
+    with threaded=False nothing runs in the background, step(k) does k updates inline with the planner's
+    own seeded generator instead, so a run is reproducible
+    """
+
+    def __init__(self, model, q, lr=0.1, batch=32, updates_per_sec=None, threaded=True, seed=None):
+        self.model = model
+        self.q = q
+        self.lr = lr
+        self.batch = batch
+        self.updates_per_sec = updates_per_sec
+        self.threaded = threaded
+        self.rng = np.random.RandomState(seed)
+
+        self.updates = 0
+        self.elapsed = 0.0  # seconds spent running
+        self._stop = threading.Event()
+        self._thread = None
+
+    def plan(self, k):
+        states, actions, rewards, nxt_states, _ = self.model.sample(k, self.rng)
+        batchUpdate(self.q, self.lr, states, actions, rewards + self.q[nxt_states].max(axis=1))
+        self.updates += k
+        return k
+
+    def step(self, k):
+        # called once per real step, plans inline only in the synchronous mode
+        if self.threaded or len(self.model) == 0:
+            return 0
+        start = time.perf_counter()
+        done = 0
+        while done < k:
+            done += self.plan(min(self.batch, k - done))
+        self.elapsed += time.perf_counter() - start
+        return done
+
+    def _run(self):
+        start = time.perf_counter()
+        planned = 0
+        while not self._stop.is_set():
+            if len(self.model) == 0:
+                time.sleep(1e-4)
+                continue
+            planned += self.plan(self.batch)
+            if self.updates_per_sec is not None:
+                # sleep off whatever is ahead of the allowed rate
+                ahead = start + planned / self.updates_per_sec - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+        self.elapsed += time.perf_counter() - start
+
+    def start(self):
+        if self.threaded and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def throughput(self):
+        # planning updates per second while running
+        return self.updates / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class ConcurrentDynaAgent(DynaAgent):
+    """
+    DynaAgent whose planning is done by a BackgroundPlanner on its Q array and model
+    threaded, the agent only acts and n_steps is ignored, the planner's rate sets how much planning happens;
+    with threaded=False it is a DynaAgent doing n_steps batched planning updates after every real step
+    telemetry counts only real-step updates when threaded, planner.updates has the planning done
+    """
+
+    def __init__(self, exp_rate=0.3, lr=0.1, n_steps=5, episodes=1, telemetry=None, layout=None, max_steps=None,
+                 batch=32, updates_per_sec=None, threaded=True, seed=None):
+        DynaAgent.__init__(self, exp_rate=exp_rate, lr=lr, n_steps=n_steps, episodes=episodes, telemetry=telemetry,
+                           planning="sequential", layout=layout, max_steps=max_steps)
+        self.planner = BackgroundPlanner(self.model, self.Q_values.array, lr=lr, batch=batch,
+                                         updates_per_sec=updates_per_sec, threaded=threaded, seed=seed)
+
+    def plan(self):
+        return self.planner.step(self.steps)
+
+    def play(self):
+        self.planner.start()
+        try:
+            DynaAgent.play(self)
+        finally:
+            self.planner.stop()
+
+
+if __name__ == "__main__":
+    N_EPISODES = 30
+
+    def report(name, agent, wall):
+        print("{:<28} | {:.2f}s | steps last 5 episodes {} | planning {} updates at {:.0f}/s".format(
+            name, wall, agent.steps_per_episode[-5:], agent.planner.updates, agent.planner.throughput()))
+
+    for name, kwargs in [("synchronous", dict(threaded=False)),
+                         ("threaded, flat out", dict(threaded=True)),
+                         ("threaded, 20000 updates/s", dict(threaded=True, updates_per_sec=20000))]:
+        np.random.seed(0)
+        agent = ConcurrentDynaAgent(n_steps=50, episodes=N_EPISODES, seed=0,
+                                    telemetry=Telemetry(sample_every=10, sinks=[printSink]), **kwargs)
+        start = time.time()
+        agent.play()
+        report(name, agent, time.time() - start)
@@ -0,0 +1,99 @@
+import time
+import numpy as np
+from MazeLayout import MazeLayout
+from DynaMaze import Maze
+
+
+def _neighbours(n, h, w):
+    i, j = divmod(n, w)
+    out = []
+    if i > 0:
+        out.append(n - w)
+    if i < h - 1:
+        out.append(n + w)
+    if j > 0:
+        out.append(n - 1)
+    if j < w - 1:
+        out.append(n + 1)
+    return out
+
+
+def _dfs(h, w, rng):
+    # recursive backtracker, long winding corridors
+    visited = bytearray(h * w)
+    visited[0] = 1
+    stack = [0]
+    carved = []
+    while stack:
+        n = stack[-1]
+        options = [m for m in _neighbours(n, h, w) if not visited[m]]
+        if not options:
+            stack.pop()
+            continue
+        m = options[rng.randint(len(options))]
+        visited[m] = 1
+        carved.append((n, m))
+        stack.append(m)
+    return carved
+
+
+def _prim(h, w, rng):
+    # randomized Prim, short branchy dead ends
+    visited = bytearray(h * w)
+    visited[0] = 1
+    frontier = [(0, m) for m in _neighbours(0, h, w)]
+    carved = []
+    while frontier:
+        k = rng.randint(len(frontier))
+        frontier[k], frontier[-1] = frontier[-1], frontier[k]
+        n, m = frontier.pop()
+        if visited[m]:
+            continue
+        visited[m] = 1
+        carved.append((n, m))
+        frontier.extend((m, x) for x in _neighbours(m, h, w) if not visited[x])
+    return carved
+
+
+def generateMaze(rows, cols, method="dfs", loops=0.0, seed=None):
+    """
+    random perfect maze as a MazeLayout: corridor cells sit on even (row, col), the cells between them are
+    walls until the generator ("dfs" or "prim") carves a passage, so every open cell is reachable
+    loops knocks out that fraction of the remaining inner walls to give more than one route
+    start is the top left cell and goal the bottom right corridor cell
+    """
+    rng = np.random.RandomState(seed)
+    h, w = (rows + 1) // 2, (cols + 1) // 2
+    if method == "dfs":
+        carved = _dfs(h, w, rng)
+    elif method == "prim":
+        carved = _prim(h, w, rng)
+    else:
+        raise ValueError("unknown maze method {}".format(method))
+
+    walls = np.ones((rows, cols), dtype=bool)
+    walls[0:2 * h:2, 0:2 * w:2] = False
+    if carved:
+        a, b = np.array(carved).T
+        # the wall between two corridor cells is at the sum of their node coordinates
+        walls[a // w + b // w, a % w + b % w] = False
+
+    if loops > 0:
+        inner = np.zeros((rows, cols), dtype=bool)
+        inner[1:2 * h - 1:2, 0:2 * w:2] = True
+        inner[0:2 * h:2, 1:2 * w - 1:2] = True
+        candidates = np.argwhere(inner & walls)
+        opened = candidates[rng.uniform(0, 1, len(candidates)) < loops]
+        walls[opened[:, 0], opened[:, 1]] = False
+    return MazeLayout(walls, (0, 0), (2 * (h - 1), 2 * (w - 1)))
+
+
+if __name__ == "__main__":
+    Maze(generateMaze(7, 9, seed=0)).showMaze()
+
+    for method in ["dfs", "prim"]:
+        for size in [100, 1000]:
+            start = time.time()
+            layout = generateMaze(size, size, method=method, seed=0)
+            print("{} {}x{} | {:.2f}s | open cells {} | wall bitmap {:.1f} MB".format(
+                method, size, size, time.time() - start, layout.freeCells(), layout.walls.nbytes / 1e6))
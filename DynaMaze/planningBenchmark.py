@@ -0,0 +1,60 @@
+import importlib
+import time
+import numpy as np
+from DynaMaze import DynaAgent
+from PrioritySweeping import PriorityAgent
+from mazeGenerator import generateMaze
+from Telemetry import Telemetry
+
+DynaAgentPlus = importlib.import_module("DynaQ+").DynaAgentPlus
+
+# name -> agent constructor taking (n_steps, episodes, telemetry, layout, max_steps)
+AGENTS = {
+    "dyna": lambda **kw: DynaAgent(**kw),
+    "dyna-batch": lambda **kw: DynaAgent(planning="sequential", **kw),
+    "dyna+": lambda **kw: DynaAgentPlus(**kw),
+    "priority": lambda **kw: PriorityAgent(**kw),
+}
+
+
+def runOne(name, layout, n_steps, episodes, max_steps, seed):
+    np.random.seed(seed)
+    agent = AGENTS[name](n_steps=n_steps, episodes=episodes, telemetry=Telemetry(capacity=episodes),
+                         layout=layout, max_steps=max_steps)
+    start = time.perf_counter()
+    agent.play()
+    wall = time.perf_counter() - start
+    record = agent.telemetry.recent()
+    planning = agent.planning_updates
+    return {"agent": name, "size": layout.rows, "n_steps": n_steps, "wall": wall,
+            "first": int(record["steps"][0]), "last": int(record["steps"][-1]), "steps": int(record["steps"].sum()),
+            "solved": int(record["return"].sum()), "planning": int(planning), "updates_per_sec": planning / wall}
+
+
+def runBenchmark(sizes=(11, 21), budgets=(5, 50), agents=tuple(AGENTS), episodes=10, max_steps=20000, method="dfs",
+                 loops=0.05, seed=0):
+    """
+    every agent on a generated size x size maze for each planning budget (n_steps), episodes are cut off
+    after max_steps real steps so an agent that fails to learn does not stall the suite
+    returns one record per run: wall time, real steps in the first / last episode and overall, episodes
+    that reached the goal, planning updates and planning updates per second
+    """
+    results = []
+    for size in sizes:
+        layout = generateMaze(size, size, method=method, loops=loops, seed=seed)
+        for n_steps in budgets:
+            for name in agents:
+                results.append(runOne(name, layout, n_steps, episodes, max_steps, seed))
+    return results
+
+
+def showResults(results):
+    print("{:<11} {:>5} {:>7} {:>9} {:>8} {:>8} {:>9} {:>7} {:>10} {:>12}".format(
+        "agent", "size", "n_steps", "wall(s)", "first", "last", "steps", "solved", "planning", "updates/sec"))
+    for r in results:
+        print("{agent:<11} {size:>5} {n_steps:>7} {wall:>9.2f} {first:>8} {last:>8} {steps:>9} {solved:>7} {planning:>10} "
+              "{updates_per_sec:>12.0f}".format(**r))
+
+
+if __name__ == "__main__":
+    showResults(runBenchmark())
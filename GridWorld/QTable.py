@@ -0,0 +1,148 @@
+import sys
+import numpy as np
+
+
+class QTable:
+    """
+    Q values in a 2-D array, one row per state and one column per action
+    q[state][action] reads and writes like the dict of dicts it replaces, so existing code and printing
+    keep working, while max / greedy of a state are single row operations
+    """
+
+    def __init__(self, states, actions, init=0):
+        self.states = list(states)
+        self.actions = list(actions)
+        self.state_index = {s: i for i, s in enumerate(self.states)}
+        self.action_index = {a: i for i, a in enumerate(self.actions)}
+        self.array = np.full((len(self.states), len(self.actions)), init, dtype=float)
+
+    def row(self, state):
+        return self.array[self.state_index[state]]
+
+    def max(self, state):
+        return self.row(state).max()
+
+    def argmax(self, state):
+        # first best action
+        return self.actions[int(self.row(state).argmax())]
+
+    def greedy(self, state):
+        # best action, ties broken at random
+        row = self.row(state)
+        best = np.flatnonzero(row == row.max())
+        if len(best) == 0:
+            # NaN values never win, if every value is NaN any action will do
+            valid = np.flatnonzero(~np.isnan(row))
+            best = valid[row[valid] == row[valid].max()] if len(valid) else np.arange(len(row))
+        if len(best) == 1:
+            return self.actions[best[0]]
+        return self.actions[best[np.random.randint(len(best))]]
+
+    def toDict(self):
+        return {s: dict(zip(self.actions, row.tolist())) for s, row in zip(self.states, self.array)}
+
+    def memoryBytes(self):
+        # Q array plus the state index and its keys
+        keys = sum(sys.getsizeof(s) for s in self.states)
+        return self.array.nbytes + sys.getsizeof(self.state_index) + sys.getsizeof(self.states) + keys
+
+    # dict of dicts view
+    def __getitem__(self, state):
+        return QRow(self, self.state_index[state])
+
+    def __contains__(self, state):
+        return state in self.state_index
+
+    def __iter__(self):
+        return iter(self.states)
+
+    def __len__(self):
+        return len(self.states)
+
+    def keys(self):
+        return list(self.states)
+
+    def values(self):
+        return [self[s] for s in self.states]
+
+    def items(self):
+        return [(s, self[s]) for s in self.states]
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+
+class QRow:
+    # the actions of one state, seen as a dict action -> value
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, action):
+        return float(self.table.array[self.index, self.table.action_index[action]])
+
+    def __setitem__(self, action, value):
+        self.table.array[self.index, self.table.action_index[action]] = value
+
+    def __contains__(self, action):
+        return action in self.table.action_index
+
+    def __iter__(self):
+        return iter(self.table.actions)
+
+    def __len__(self):
+        return len(self.table.actions)
+
+    def keys(self):
+        return list(self.table.actions)
+
+    def values(self):
+        return self.table.array[self.index].tolist()
+
+    def items(self):
+        return list(zip(self.table.actions, self.values()))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class SparseQTable(QTable):
+    """
+    QTable for state spaces too large to allocate up front: a state gets a row the first time
+    q[state] is accessed, rows live in one array grown by doubling
+    max / greedy on a state that has no row answer from the initial value without allocating it
+    """
+
+    def __init__(self, actions, init=0, capacity=1024):
+        QTable.__init__(self, [], actions, init)
+        self.init = init
+        self.array = np.full((capacity, len(self.actions)), init, dtype=float)
+        self.unseen = np.full(len(self.actions), init, dtype=float)
+
+    def _allocate(self, state):
+        index = self.state_index.get(state)
+        if index is None:
+            index = len(self.states)
+            if index == len(self.array):
+                grown = np.full((2 * len(self.array), len(self.actions)), self.init, dtype=float)
+                grown[:index] = self.array
+                self.array = grown
+            self.state_index[state] = index
+            self.states.append(state)
+        return index
+
+    def row(self, state):
+        index = self.state_index.get(state)
+        return self.unseen if index is None else self.array[index]
+
+    def __getitem__(self, state):
+        return QRow(self, self._allocate(state))
+
+    def memoryBytes(self):
+        # only allocated rows are counted for the array, spare capacity is reported by capacityBytes
+        keys = sum(sys.getsizeof(s) for s in self.states)
+        rows = len(self.states) * self.array.shape[1] * self.array.itemsize
+        return rows + sys.getsizeof(self.state_index) + sys.getsizeof(self.states) + keys
+
+    def capacityBytes(self):
+        return self.array.nbytes
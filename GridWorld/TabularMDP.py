@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class TabularMDP:
+    """
+    a grid environment compiled to integer state and action ids:
+    next_state[s, a], reward[s, a] (reward of landing in next_state) and terminal[s],
+    so that a step is array indexing instead of per-step move logic on tuples and action strings
+    terminal states are absorbing with reward 0
+    """
+
+    def __init__(self, positions, actions, next_state, reward, terminal, start):
+        self.positions = positions  # state id -> position
+        self.index = {p: s for s, p in enumerate(positions)}  # position -> state id
+        self.actions = actions
+        self.action_index = {a: i for i, a in enumerate(actions)}
+        self.next_state = next_state
+        self.reward = reward
+        self.terminal = terminal
+        self.start = self.index[start]
+        self.n_states, self.n_actions = next_state.shape
+
+    @classmethod
+    def compile(cls, positions, actions, transition, isTerminal, start):
+        """
+        transition(position, action) -> (next position, reward), called once per pair
+        isTerminal(position) -> True if the game ends on reaching position
+        """
+        positions = list(positions)
+        index = {p: s for s, p in enumerate(positions)}
+        next_state = np.zeros((len(positions), len(actions)), dtype=np.int64)
+        reward = np.zeros((len(positions), len(actions)))
+        terminal = np.array([bool(isTerminal(p)) for p in positions])
+        for s, p in enumerate(positions):
+            for a, action in enumerate(actions):
+                if terminal[s]:
+                    next_state[s, a] = s
+                    continue
+                nxt, r = transition(p, action)
+                next_state[s, a] = index[nxt]
+                reward[s, a] = r
+        return cls(positions, actions, next_state, reward, terminal, start)
+
+    def step(self, s, a):
+        # works the same on scalars and on arrays of ids
+        nxt = self.next_state[s, a]
+        return nxt, self.reward[s, a], self.terminal[nxt]
+
+    def position(self, s):
+        return self.positions[s]
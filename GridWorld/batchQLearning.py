@@ -0,0 +1,119 @@
+import time
+import numpy as np
+from gridWorldDP import GridWorldDP, ACTIONS
+
+
+class BatchQLearning:
+    """
+    N independent copies of gridWorld_Q.Agent on the same grid world, advanced in lockstep
+    learning is Agent.play's: nothing is updated during an episode, at its end the end state's Q row is set
+    to the reward and the episode's (state, action) pairs are swept backwards with Q += lr (gamma Q_next - Q),
+    stored rounded to 3 places
+    all Q tables are one (N, states, actions) array; lr, exp_rate and gamma can be scalars
+    or one value per agent, so a seed or hyperparameter sweep is a single run
+    the dynamics (including the 0.8/0.1/0.1 slip) come from a GridWorldDP
+    """
+
+    def __init__(self, n_agents, grid=None, start=(2, 0), lr=0.2, exp_rate=0.3, gamma=0.9, seed=None):
+        self.grid = GridWorldDP() if grid is None else grid
+        self.n = n_agents
+        self.start = self.grid.index(start)
+        self.lr = np.broadcast_to(np.asarray(lr, dtype=float), (n_agents,))
+        self.exp_rate = np.broadcast_to(np.asarray(exp_rate, dtype=float), (n_agents,))
+        self.gamma = np.broadcast_to(np.asarray(gamma, dtype=float), (n_agents,))
+        self.rng = np.random.RandomState(seed)
+
+        self.Q_values = np.zeros((n_agents, self.grid.n_states, len(ACTIONS)))
+        self.states = np.full(n_agents, self.start)
+        self.episodes = np.zeros(n_agents, dtype=np.int64)
+        self.steps = np.zeros(n_agents, dtype=np.int64)  # steps in the current episode
+        self.total_steps = 0
+        # (state, action) of every step of each agent's current episode, widened as episodes get longer
+        self.trajectory_states = np.zeros((n_agents, 64), dtype=np.int64)
+        self.trajectory_actions = np.zeros((n_agents, 64), dtype=np.int64)
+
+    def chooseActions(self, idx):
+        # epsilon-greedy for the agents in idx, greedy ties broken at random
+        q = self.Q_values[idx, self.states[idx]]
+        best = q == q.max(axis=1, keepdims=True)
+        greedy = np.argmax(best * self.rng.uniform(0.1, 1, q.shape), axis=1)
+        random = self.rng.randint(len(ACTIONS), size=len(idx))
+        return np.where(self.rng.uniform(0, 1, len(idx)) <= self.exp_rate[idx], random, greedy)
+
+    def step(self, idx):
+        s = self.states[idx]
+        a = self.chooseActions(idx)
+        # sample which of the action's outcomes (itself or a slip) happens
+        outcome = np.searchsorted(np.cumsum(self.grid.outcome_probs), self.rng.uniform(0, 1, len(idx)), side='right')
+        outcome = np.minimum(outcome, len(self.grid.outcome_probs) - 1)
+        nxt = self.grid.next_state[self.grid.outcomes[a, outcome], s]
+
+        t = self.steps[idx]
+        if t.max() >= self.trajectory_states.shape[1]:
+            self.trajectory_states = np.hstack([self.trajectory_states, np.zeros_like(self.trajectory_states)])
+            self.trajectory_actions = np.hstack([self.trajectory_actions, np.zeros_like(self.trajectory_actions)])
+        self.trajectory_states[idx, t] = s
+        self.trajectory_actions[idx, t] = a
+
+        done = self.grid.terminal[nxt]
+        self.steps[idx] += 1
+        self.total_steps += len(idx)
+        if done.any():
+            self.backup(idx[done], nxt[done])
+        self.states[idx] = np.where(done, self.start, nxt)
+        return idx[done]
+
+    def backup(self, agents, ends):
+        # Agent.play's end of game update for the agents that just reached an end state
+        reward = self.grid.reward[ends].astype(float)
+        self.Q_values[agents, ends, :] = reward[:, None]
+        lengths = self.steps[agents]
+        for t in range(lengths.max() - 1, -1, -1):
+            sel = t < lengths
+            who = agents[sel]
+            s, a = self.trajectory_states[who, t], self.trajectory_actions[who, t]
+            current = self.Q_values[who, s, a]
+            reward[sel] = current + self.lr[who] * (self.gamma[who] * reward[sel] - current)
+            self.Q_values[who, s, a] = np.round(reward[sel], 3)
+
+    def play(self, rounds=10, max_steps=None):
+        """
+        run until every agent has finished `rounds` more episodes, agents that are done wait for the rest
+        returns the number of steps each agent took in each of those episodes, shape (N, rounds)
+        """
+        target = self.episodes + rounds
+        lengths = np.zeros((self.n, rounds), dtype=np.int64)
+        idx = np.nonzero(self.episodes < target)[0]
+        while len(idx):
+            finished = self.step(idx)
+            if len(finished):
+                lengths[finished, self.episodes[finished] - (target[finished] - rounds)] = self.steps[finished]
+                self.episodes[finished] += 1
+                self.steps[finished] = 0
+                idx = np.nonzero(self.episodes < target)[0]
+            if max_steps is not None and self.total_steps >= max_steps:
+                break
+        return lengths
+
+    def greedyPolicies(self):
+        # action index per agent and state
+        return self.Q_values.argmax(axis=2)
+
+
+if __name__ == "__main__":
+    n_agents = 500
+    learners = BatchQLearning(n_agents, lr=np.linspace(0.05, 0.5, n_agents), seed=0)
+
+    start = time.time()
+    lengths = learners.play(200)
+    elapsed = time.time() - start
+    print("{} agents x 200 episodes in {:.2f}s ({:.0f} agent-steps/sec)".format(
+        n_agents, elapsed, learners.total_steps / elapsed))
+    print("mean episode length, first 10 / last 10 episodes:", lengths[:, :10].mean(), lengths[:, -10:].mean())
+
+    # compare with the exact optimal policy
+    grid = learners.grid
+    _, optimal = grid.valueIteration()
+    free = ~grid.terminal & ~grid.blocked.reshape(-1)
+    agree = (learners.greedyPolicies()[:, free] == optimal[free]).mean(axis=1)
+    print("share of states where the greedy action is optimal: mean {:.2f}, min {:.2f}".format(agree.mean(), agree.min()))
@@ -1,4 +1,6 @@
 import numpy as np
+from TabularMDP import TabularMDP
+from Telemetry import Telemetry, printSink
 
 # global variables
 BOARD_ROWS = 3
@@ -71,11 +73,24 @@ class State:
         print('-----------------')
 
 
+def compileMDP():
+    # deterministic State dynamics as integer-id arrays
+    def transition(position, action):
+        state = State(state=position)
+        nxt = state.nxtPosition(action)
+        return nxt, State(state=nxt).giveReward()
+
+    positions = [(i, j) for i in range(BOARD_ROWS) for j in range(BOARD_COLS)]
+    return TabularMDP.compile(positions, ["up", "down", "left", "right"], transition,
+                              lambda p: p in (WIN_STATE, LOSE_STATE), START)
+
+
 # Agent of player
 
 class Agent:
 
-    def __init__(self):
+    def __init__(self, telemetry=None):
+        self.telemetry = Telemetry() if telemetry is None else telemetry
         self.states = []
         self.actions = ["up", "down", "left", "right"]
         self.State = State()
@@ -115,6 +130,7 @@ class Agent:
 
     def play(self, rounds=10):
         i = 0
+        self.telemetry.startEpisode()
         while i < rounds:
             # to the end of game back propagate reward
             if self.State.isEnd:
@@ -122,7 +138,8 @@ class Agent:
                 reward = self.State.giveReward()
                 # explicitly assign end state to reward values
                 self.state_values[self.State.state] = reward  # this is optional
-                print("Game End Reward", reward)
+                self.telemetry.debug("Game End Reward {}", reward)
+                self.telemetry.endEpisode(len(self.states), reward, len(self.states))
                 for s in reversed(self.states):
                     reward = self.state_values[s] + self.lr * (reward - self.state_values[s])
                     self.state_values[s] = round(reward, 3)
@@ -132,13 +149,12 @@ class Agent:
                 action = self.chooseAction()
                 # append trace
                 self.states.append(self.State.nxtPosition(action))
-                print("current position {} action {}".format(self.State.state, action))
+                self.telemetry.debug("current position {} action {}", self.State.state, action)
                 # by taking the action, it reaches the next state
                 self.State = self.takeAction(action)
                 # mark is end
                 self.State.isEndFunc()
-                print("nxt state", self.State.state)
-                print("---------------------")
+                self.telemetry.debug("nxt state {}\n---------------------", self.State.state)
 
     def showValues(self):
         for i in range(0, BOARD_ROWS):
@@ -151,6 +167,6 @@ class Agent:
 
 
 if __name__ == "__main__":
-    ag = Agent()
+    ag = Agent(telemetry=Telemetry(sample_every=10, sinks=[printSink]))
     ag.play(50)
     print(ag.showValues())
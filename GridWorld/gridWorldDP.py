@@ -0,0 +1,168 @@
+import numpy as np
+from gridWorld import Agent
+
+ACTIONS = ["up", "down", "left", "right"]
+MOVES = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+# directions an action can slip to, as in gridWorld_Q.State._chooseActionProb
+SLIPS = {"up": ("left", "right"), "down": ("left", "right"), "left": ("up", "down"), "right": ("up", "down")}
+
+
+class GridWorldDP:
+    """
+    exact dynamic programming for grid worlds of any size with the State.nxtPosition dynamics:
+    a move off the board or into a block leaves the agent in place, and with probability `slip`
+    the action is replaced by one of its two perpendicular directions (slip=0.2 is the 0.8/0.1/0.1 of gridWorld_Q)
+    reaching WIN gives 1 and LOSE gives -1 and ends the game; as in Agent.showValues the value shown
+    for an end state is its reward
+    states are numbered r * cols + c
+    """
+
+    def __init__(self, rows=3, cols=4, win=(0, 3), lose=(1, 3), blocks=((1, 1),), slip=0.2, gamma=0.9):
+        self.rows = rows
+        self.cols = cols
+        self.n_states = rows * cols
+        self.slip = slip
+        self.gamma = gamma
+
+        self.blocked = np.zeros((rows, cols), dtype=bool)
+        for b in blocks:
+            self.blocked[b] = True
+        self.reward = np.zeros(self.n_states)
+        self.reward[self.index(win)] = 1
+        self.reward[self.index(lose)] = -1
+        self.terminal = self.reward != 0
+
+        # next_state[a, s] for the intended move of every action
+        r, c = np.divmod(np.arange(self.n_states), cols)
+        self.next_state = np.zeros((len(ACTIONS), self.n_states), dtype=np.int64)
+        for a, action in enumerate(ACTIONS):
+            dr, dc = MOVES[action]
+            nr, nc = r + dr, c + dc
+            legal = (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+            legal[legal] &= ~self.blocked[nr[legal], nc[legal]]
+            self.next_state[a] = np.where(legal, nr * cols + nc, r * cols + c)
+
+        # every action has three outcomes: itself and its two slips
+        self.outcomes = np.array([[ACTIONS.index(action)] + [ACTIONS.index(s) for s in SLIPS[action]]
+                                  for action in ACTIONS])
+        self.outcome_probs = np.array([1 - slip, slip / 2, slip / 2])
+
+    def index(self, position):
+        return position[0] * self.cols + position[1]
+
+    def transitionTensor(self):
+        # dense P[a, s, s'], only sensible for small grids
+        P = np.zeros((len(ACTIONS), self.n_states, self.n_states))
+        states = np.arange(self.n_states)
+        for a in range(len(ACTIONS)):
+            for o, p in zip(self.outcomes[a], self.outcome_probs):
+                np.add.at(P[a], (states, self.next_state[o]), p)
+        return P
+
+    def qValues(self, values):
+        # Q[a, s] = gamma * E[V(s')], computed for all states and actions at once
+        expected = np.tensordot(self.outcome_probs, values[self.next_state[self.outcomes]], axes=(0, 1))
+        return self.gamma * expected
+
+    def _fixEnds(self, values):
+        values[self.terminal] = self.reward[self.terminal]
+        values[self.blocked.reshape(-1)] = 0
+        return values
+
+    def valueIteration(self, tol=1e-10, max_iter=100000):
+        values = self._fixEnds(np.zeros(self.n_states))
+        for i in range(max_iter):
+            new_values = self._fixEnds(self.qValues(values).max(axis=0))
+            delta = np.max(np.abs(new_values - values))
+            values = new_values
+            if delta < tol:
+                break
+        self.iterations = i + 1
+        return values, self.qValues(values).argmax(axis=0)
+
+    def evaluatePolicy(self, policy, tol=1e-10, max_iter=100000):
+        # V of a deterministic policy given as one action index per state
+        values = self._fixEnds(np.zeros(self.n_states))
+        states = np.arange(self.n_states)
+        for _ in range(max_iter):
+            new_values = self._fixEnds(self.qValues(values)[policy, states])
+            delta = np.max(np.abs(new_values - values))
+            values = new_values
+            if delta < tol:
+                break
+        return values
+
+    def epsilonGreedyValues(self, epsilon, tol=1e-10, max_iter=100000):
+        """
+        V of the epsilon-greedy policy on its own values: with probability epsilon a uniformly random action,
+        otherwise the greedy one, i.e. the on-policy fixed point an exp_rate=epsilon learner settles at
+        returns the values and the greedy action of every state
+        """
+        values = self._fixEnds(np.zeros(self.n_states))
+        for _ in range(max_iter):
+            q = self.qValues(values)
+            new_values = self._fixEnds((1 - epsilon) * q.max(axis=0) + epsilon * q.mean(axis=0))
+            delta = np.max(np.abs(new_values - values))
+            values = new_values
+            if delta < tol:
+                break
+        return values, self.qValues(values).argmax(axis=0)
+
+    def policyIteration(self, tol=1e-10, max_iter=1000):
+        policy = np.zeros(self.n_states, dtype=np.int64)
+        for i in range(max_iter):
+            values = self.evaluatePolicy(policy, tol)
+            q = self.qValues(values)
+            # keep the current action unless another is strictly better, so the loop terminates
+            current = q[policy, np.arange(self.n_states)]
+            new_policy = np.where(q.max(axis=0) > current + tol, q.argmax(axis=0), policy)
+            if np.array_equal(new_policy, policy):
+                break
+            policy = new_policy
+        self.iterations = i + 1
+        return values, policy
+
+    def stateValues(self, values):
+        # same layout as Agent.state_values
+        return {(i, j): values[self.index((i, j))] for i in range(self.rows) for j in range(self.cols)}
+
+    def showValues(self, values):
+        for i in range(0, self.rows):
+            print('----------------------------------')
+            out = '| '
+            for j in range(0, self.cols):
+                out += str(round(values[self.index((i, j))], 3)).ljust(6) + ' | '
+            print(out)
+        print('----------------------------------')
+
+    def showPolicy(self, policy):
+        arrows = {"up": "^", "down": "v", "left": "<", "right": ">"}
+        for i in range(0, self.rows):
+            out = '| '
+            for j in range(0, self.cols):
+                s = self.index((i, j))
+                token = 'z' if self.blocked[i, j] else '*' if self.terminal[s] else arrows[ACTIONS[policy[s]]]
+                out += token + ' | '
+            print(out)
+
+
+if __name__ == "__main__":
+    # deterministic moves, no discount and exp_rate=0.3 exploration, as in gridWorld.py: the on-policy values
+    # gridWorld.Agent estimates; with its constant lr=0.2 its table stays noisy around these
+    dp = GridWorldDP(slip=0, gamma=1)
+    values, policy = dp.epsilonGreedyValues(0.3)
+    dp.showValues(values)
+    agent = Agent()
+    agent.play(2000)
+    agent.showValues()
+    learned = np.array([agent.state_values[(i, j)] for i in range(dp.rows) for j in range(dp.cols)])
+    print("largest gap to the learned values:", np.abs(learned - values).max())
+
+    # 0.8/0.1/0.1 slip, as in gridWorld_Q.py
+    dp = GridWorldDP(slip=0.2)
+    values, policy = dp.valueIteration()
+    dp.showValues(values)
+    dp.showPolicy(policy)
+
+    values_pi, policy_pi = dp.policyIteration()
+    print("policy iteration agrees:", np.allclose(values, values_pi))
@@ -1,4 +1,6 @@
 import numpy as np
+from QTable import QTable
+from Telemetry import Telemetry, printSink
 
 BOARD_ROWS = 3
 BOARD_COLS = 4
@@ -89,7 +91,8 @@ class State:
 
 class Agent:
 
-    def __init__(self):
+    def __init__(self, telemetry=None):
+        self.telemetry = Telemetry() if telemetry is None else telemetry
         self.states = []  # record position and action taken at the position
         self.actions = ["up", "down", "left", "right"]
         self.State = State()
@@ -99,28 +102,16 @@ class Agent:
         self.decay_gamma = 0.9
 
         # initial Q values
-        self.Q_values = {}
-        for i in range(BOARD_ROWS):
-            for j in range(BOARD_COLS):
-                self.Q_values[(i, j)] = {}
-                for a in self.actions:
-                    self.Q_values[(i, j)][a] = 0  # Q value is a dict of dict
+        positions = [(i, j) for i in range(BOARD_ROWS) for j in range(BOARD_COLS)]
+        self.Q_values = QTable(positions, self.actions)  # reads like a dict of dict
 
     def chooseAction(self):
         # choose action with most expected value
-        mx_nxt_reward = 0
-        action = ""
-
         if np.random.uniform(0, 1) <= self.exp_rate:
             action = np.random.choice(self.actions)
         else:
-            # greedy action
-            for a in self.actions:
-                current_position = self.State.state
-                nxt_reward = self.Q_values[current_position][a]
-                if nxt_reward >= mx_nxt_reward:
-                    action = a
-                    mx_nxt_reward = nxt_reward
+            # greedy action, ties broken at random
+            action = self.Q_values.greedy(self.State.state)
             # print("current pos: {}, greedy aciton: {}".format(self.State.state, action))
         return action
 
@@ -136,6 +127,7 @@ class Agent:
 
     def play(self, rounds=10):
         i = 0
+        self.telemetry.startEpisode()
         while i < rounds:
             # to the end of game back propagate reward
             if self.State.isEnd:
@@ -143,7 +135,8 @@ class Agent:
                 reward = self.State.giveReward()
                 for a in self.actions:
                     self.Q_values[self.State.state][a] = reward
-                print("Game End Reward", reward)
+                self.telemetry.debug("Game End Reward {}", reward)
+                self.telemetry.endEpisode(len(self.states), reward, len(self.states))
                 for s in reversed(self.states):
                     current_q_value = self.Q_values[s[0]][s[1]]
                     reward = current_q_value + self.lr * (self.decay_gamma * reward - current_q_value)
@@ -154,18 +147,17 @@ class Agent:
                 action = self.chooseAction()
                 # append trace
                 self.states.append([(self.State.state), action])
-                print("current position {} action {}".format(self.State.state, action))
+                self.telemetry.debug("current position {} action {}", self.State.state, action)
                 # by taking the action, it reaches the next state
                 self.State = self.takeAction(action)
                 # mark is end
                 self.State.isEndFunc()
-                print("nxt state", self.State.state)
-                print("---------------------")
+                self.telemetry.debug("nxt state {}\n---------------------", self.State.state)
                 self.isEnd = self.State.isEnd
 
 
 if __name__ == "__main__":
-    ag = Agent()
+    ag = Agent(telemetry=Telemetry(sample_every=10, sinks=[printSink]))
     print("initial Q-values ... \n")
     print(ag.Q_values)
 
@@ -0,0 +1,100 @@
+import heapq
+import time
+import numpy as np
+from gridWorldDP import GridWorldDP
+
+
+class PrioritizedValueIteration:
+    """
+    asynchronous (Gauss-Seidel) value iteration on a GridWorldDP
+    states wait in a priority queue keyed by their Bellman residual |max_a Q(s, a) - V(s)|; the largest
+    `batch_size` are backed up in place, then only their predecessors have residuals recomputed and re-queued
+    stops once no residual is above tol; batch_size=1 is classic prioritized sweeping, larger batches
+    trade a little ordering for vectorized backups on large maps
+    """
+
+    def __init__(self, grid, batch_size=256):
+        self.grid = grid
+        self.batch_size = batch_size
+        # successors[s, a, k]: next state of outcome k of action a
+        self.successors = np.ascontiguousarray(grid.next_state[grid.outcomes].transpose(2, 0, 1)).astype(np.int32)
+        self.free = ~grid.terminal & ~grid.blocked.reshape(-1)
+
+        # predecessors of every state in CSR form: pred_states[pred_start[s]:pred_start[s + 1]]
+        src = np.repeat(np.arange(grid.n_states), grid.next_state.shape[0])
+        dst = grid.next_state.T.reshape(-1)
+        pairs = np.unique(np.stack([dst, src], axis=1)[self.free[src] & (src != dst)], axis=0)
+        self.pred_states = pairs[:, 1]
+        self.pred_start = np.searchsorted(pairs[:, 0], np.arange(grid.n_states + 1))
+        self.backups = 0
+
+    def bellman(self, values, states):
+        q = self.grid.gamma * values[self.successors[states]] @ self.grid.outcome_probs
+        return q.max(axis=1)
+
+    def predecessors(self, states):
+        starts, ends = self.pred_start[states], self.pred_start[states + 1]
+        counts = ends - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return np.unique(self.pred_states[offsets])
+
+    def solve(self, tol=1e-8):
+        grid = self.grid
+        values = grid._fixEnds(np.zeros(grid.n_states))
+        free_states = np.nonzero(self.free)[0]
+
+        priority = np.zeros(grid.n_states)
+        priority[free_states] = np.abs(self.bellman(values, free_states) - values[free_states])
+        heap = [(-priority[s], s) for s in free_states[priority[free_states] > tol].tolist()]
+        heapq.heapify(heap)
+
+        self.backups = 0
+        while heap:
+            batch = []
+            while heap and len(batch) < self.batch_size:
+                p, s = heapq.heappop(heap)
+                # skip entries whose state was re-queued with a different priority since
+                if -p == priority[s] and priority[s] > 0:
+                    batch.append(s)
+                    priority[s] = 0
+            if not batch:
+                continue
+            batch = np.array(batch)
+            values[batch] = self.bellman(values, batch)
+            self.backups += len(batch)
+
+            affected = np.union1d(self.predecessors(batch), batch)
+            affected = affected[self.free[affected]]
+            residual = np.abs(self.bellman(values, affected) - values[affected])
+            changed = (residual > tol) & (residual != priority[affected])
+            for s, r in zip(affected[changed].tolist(), residual[changed].tolist()):
+                priority[s] = r
+                heapq.heappush(heap, (-r, s))
+        return values, grid.qValues(values).argmax(axis=0)
+
+
+def randomGrid(size, block_density=0.2, seed=0, slip=0.2, gamma=0.95):
+    rng = np.random.RandomState(seed)
+    blocks = [tuple(b) for b in np.argwhere(rng.uniform(0, 1, (size, size)) < block_density)]
+    # keep the corner around the terminals open so the win state is reachable
+    blocks = [b for b in blocks if not (b[0] < 3 and b[1] > size - 4)]
+    return GridWorldDP(size, size, win=(0, size - 1), lose=(1, size - 1), blocks=blocks, slip=slip, gamma=gamma)
+
+
+if __name__ == "__main__":
+    for size in [100, 300, 1000]:
+        grid = randomGrid(size)
+        n_free = int((~grid.terminal & ~grid.blocked.reshape(-1)).sum())
+
+        start = time.time()
+        solver = PrioritizedValueIteration(grid)
+        values, policy = solver.solve(tol=1e-6)
+        async_time = time.time() - start
+
+        start = time.time()
+        sync_values, _ = grid.valueIteration(tol=1e-6)
+        sync_time = time.time() - start
+        sync_backups = grid.iterations * n_free
+
+        print("{0}x{0} | prioritized {1} backups {2:.2f}s | synchronous {3} backups {4:.2f}s | max diff {5:.1e}".format(
+            size, solver.backups, async_time, sync_backups, sync_time, np.abs(values - sync_values).max()))
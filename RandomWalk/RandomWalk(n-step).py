@@ -1,4 +1,5 @@
 import numpy as np
+from QTable import QTable
 
 # 19 states (not including the ending state)
 NUM_STATES = 19
@@ -18,18 +19,11 @@ class RandomWalk:
         self.gamma = gamma
         self.debug = debug
         # init q estimates
-        self.Q_values = {}
-        for i in range(NUM_STATES + 2):
-            self.Q_values[i] = {}
-            for a in self.actions:
-                if i in [END_0, END_1]:
-                    # explicitly set end state values
-                    if i == END_0:
-                        self.Q_values[i][a] = -1
-                    else:
-                        self.Q_values[i][a] = 1
-                else:
-                    self.Q_values[i][a] = 0
+        self.Q_values = QTable(range(NUM_STATES + 2), self.actions)
+        # explicitly set end state values
+        for a in self.actions:
+            self.Q_values[END_0][a] = -1
+            self.Q_values[END_1][a] = 1
 
     def chooseAction(self):
         action = np.random.choice(self.actions)
@@ -122,7 +116,7 @@ if __name__ == "__main__":
             rw = RandomWalk(n=n, lr=lr, debug=False)
             rw.play(episodes)
             # V(s) = 0.5*Q(S, 'left') + 0.5*Q(S, 'right')
-            estimate_state_values = [np.mean(list(v.values())) for v in rw.Q_values.values()]
+            estimate_state_values = rw.Q_values.array.mean(axis=1)
 
             ers.append(np.mean([er ** 2 for er in actual_state_values - np.array(estimate_state_values)]))
         sq_errors[n] = ers
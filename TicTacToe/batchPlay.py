@@ -0,0 +1,109 @@
+import numpy as np
+from ticTacToe import Player, BOARD_CELLS, POW3, N_CODES, CODE_DIGITS, CANONICAL, WINNER, TERMINAL
+
+MAX_MOVES = (BOARD_CELLS + 1) // 2  # most moves one player can make in a game
+
+
+class BatchState:
+    """
+    self-play of many games in lockstep, boards held as an array of base-3 codes
+    players' states_value tables are copied into dense arrays for the run and written back at the end,
+    so the trained Player objects can be used as usual afterwards
+    """
+
+    def __init__(self, p1, p2, batch_size=1000):
+        self.p1 = p1
+        self.p2 = p2
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _toArray(player):
+        values = np.zeros(N_CODES)
+        seen = np.zeros(N_CODES, dtype=bool)
+        for k, v in player.states_value.items():
+            values[k] = v
+            seen[k] = True
+        return values, seen
+
+    @staticmethod
+    def _toDict(player, values, seen):
+        keys = np.nonzero(seen)[0]
+        player.states_value.update(zip(keys.tolist(), values[keys].tolist()))
+
+    @staticmethod
+    def chooseActions(codes, values, exp_rate, symbol):
+        # epsilon-greedy over afterstates for every board, returns the chosen cell index per board
+        candidates = codes[:, None] + (symbol % 3) * POW3
+        legal = CODE_DIGITS[codes] == 0
+        candidate_values = np.where(legal, values[CANONICAL[np.where(legal, candidates, 0)]], -np.inf)
+        # Player.chooseAction keeps the last of equal maxima
+        greedy = BOARD_CELLS - 1 - np.argmax(candidate_values[:, ::-1], axis=1)
+        random = np.argmax(np.where(legal, np.random.uniform(0, 1, legal.shape), -1), axis=1)
+        explore = np.random.uniform(0, 1, len(codes)) <= exp_rate
+        return np.where(explore, random, greedy)
+
+    @staticmethod
+    def backup(player, values, seen, trajectory, lengths, reward):
+        """
+        Player.feedReward for all games at once, stepping backwards through the trajectories
+        a state backed up by n games at the same step gets all n updates: v moves to
+        target + (1 - lr)^n (v - target), target being the mean of their targets, which is what n updates
+        one after another give for equal targets and, over a random order of the games, on average otherwise
+        """
+        reward = np.array(reward, dtype=float)
+        for t in range(trajectory.shape[1] - 1, -1, -1):
+            idx = np.nonzero(t < lengths)[0]
+            keys = trajectory[idx, t]
+            seen[keys] = True
+            unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            target = np.bincount(inverse.ravel(), player.decay_gamma * reward[idx]) / counts
+            values[unique] = target + (1 - player.lr)**counts * (values[unique] - target)
+            reward[idx] = values[keys]
+
+    def playBatch(self, n, tables):
+        codes = np.zeros(n, dtype=np.int64)
+        active = np.ones(n, dtype=bool)
+        trajectory = np.zeros((2, n, MAX_MOVES), dtype=np.int64)
+        lengths = np.zeros((2, n), dtype=np.int64)
+        players = [self.p1, self.p2]
+        turn, symbol = 0, 1
+        while active.any():
+            idx = np.nonzero(active)[0]
+            cells = self.chooseActions(codes[idx], tables[turn][0], players[turn].exp_rate, symbol)
+            codes[idx] += (symbol % 3) * POW3[cells]
+            trajectory[turn, idx, lengths[turn, idx]] = CANONICAL[codes[idx]]
+            lengths[turn, idx] += 1
+            active[idx] = ~TERMINAL[codes[idx]]
+            turn, symbol = 1 - turn, -symbol
+
+        # same rewards as State.giveReward
+        winner = WINNER[codes]
+        rewards = [np.where(winner == 1, 1, np.where(winner == -1, 0, 0.1)),
+                   np.where(winner == 1, 0, np.where(winner == -1, 1, 0.5))]
+        for turn in range(2):
+            values, seen = tables[turn]
+            self.backup(players[turn], values, seen, trajectory[turn], lengths[turn], rewards[turn])
+        return winner
+
+    def play(self, rounds=100):
+        tables = [self._toArray(self.p1), self._toArray(self.p2)]
+        done = 0
+        while done < rounds:
+            print("Rounds {}".format(done))
+            n = min(self.batch_size, rounds - done)
+            self.playBatch(n, tables)
+            done += n
+        self._toDict(self.p1, *tables[0])
+        self._toDict(self.p2, *tables[1])
+
+
+if __name__ == "__main__":
+    # training
+    p1 = Player("p1")
+    p2 = Player("p2")
+
+    st = BatchState(p1, p2, batch_size=5000)
+    print("training...")
+    st.play(50000)
+    p1.savePolicy()
+    p2.savePolicy()
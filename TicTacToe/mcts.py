@@ -0,0 +1,175 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from ticTacToe import State, Player, HumanPlayer, boardCode, BOARD_CELLS, BOARD_COLS, POW3, CODE_DIGITS, \
+    CANONICAL, WINNER, TERMINAL, LEGAL_MOVES
+
+# number of stones on the board of every code
+STONES = (CODE_DIGITS != 0).sum(axis=1)
+
+
+def rollouts(code, symbol, n):
+    # n random games played to the end from code with symbol to move, all at once, returns the winners
+    codes = np.full(n, code, dtype=np.int64)
+    symbols = np.full(n, symbol)
+    active = ~TERMINAL[codes]
+    while active.any():
+        idx = np.nonzero(active)[0]
+        legal = CODE_DIGITS[codes[idx]] == 0
+        cells = np.argmax(np.where(legal, np.random.uniform(0, 1, legal.shape), -1), axis=1)
+        codes[idx] += (symbols[idx] % 3) * POW3[cells]
+        symbols[idx] = -symbols[idx]
+        active[idx] = ~TERMINAL[codes[idx]]
+    return WINNER[codes]
+
+
+def searchWorker(args):
+    # root-parallel search in a worker process, returns its statistics table and iteration count
+    table, code, symbol, time_budget, seed, options = args
+    np.random.seed(seed)
+    player = MCTSPlayer("worker", time_budget=time_budget, **options)
+    player.table = table
+    player.search(code, symbol)
+    return player.table, player.iterations
+
+
+class MCTSPlayer:
+    """
+    UCT Monte Carlo tree search with the chooseAction interface of Player
+    node statistics live in a transposition table keyed by canonical code, so symmetric positions share them;
+    the table is kept between moves, keeping the subtree under the move actually played, and entries that can
+    no longer be reached (fewer stones than the current board) are dropped
+    each expansion runs rollout_batch random games at once; with workers > 1 the search is also run in a process
+    pool from the same root (root parallelization) and the statistics are summed
+    """
+
+    def __init__(self, name, time_budget=0.1, c=1.4, rollout_batch=8, workers=1, max_iterations=None):
+        self.name = name
+        self.time_budget = time_budget  # seconds per move
+        self.c = c
+        self.rollout_batch = rollout_batch
+        self.workers = workers
+        self.max_iterations = max_iterations
+        self.table = {}  # canonical code -> [visits, total reward of the player who moved into it]
+        self.iterations = 0
+        self.pool = None
+
+    def _children(self, code, symbol):
+        mask = int(LEGAL_MOVES[code])
+        cells = [i for i in range(BOARD_CELLS) if mask >> i & 1]
+        return cells, code + (symbol % 3) * POW3[cells]
+
+    def iterate(self, code, symbol):
+        # one selection / expansion / batched rollout / backup pass from the root code
+        path = [int(CANONICAL[code])]
+        mover = -symbol  # player who moved into the current node
+        while not TERMINAL[code]:
+            parent_visits = self.table.get(path[-1], [1, 0])[0]
+            cells, child_codes = self._children(code, -mover)
+            keys = CANONICAL[child_codes].tolist()
+            unvisited = [i for i, k in enumerate(keys) if k not in self.table]
+            if unvisited:
+                i = unvisited[np.random.randint(len(unvisited))]
+                code, mover = int(child_codes[i]), -mover
+                path.append(keys[i])
+                break
+            scores = []
+            for k in keys:
+                visits, total = self.table[k]
+                scores.append(total / visits + self.c * np.sqrt(np.log(parent_visits) / visits))
+            i = int(np.argmax(scores))
+            code, mover = int(child_codes[i]), -mover
+            path.append(keys[i])
+
+        winners = rollouts(code, -mover, self.rollout_batch)
+        n = len(winners)
+        wins = np.sum(winners == mover)
+        ties = np.sum(winners == 0)
+        # walk back up, alternating the player the reward is counted for
+        for k in reversed(path):
+            stats = self.table.setdefault(k, [0, 0.0])
+            stats[0] += n
+            stats[1] += wins + 0.5 * ties
+            wins = n - wins - ties
+        self.iterations += 1
+
+    def search(self, code, symbol):
+        deadline = time.time() + self.time_budget
+        iterations = 0
+        while time.time() < deadline and (self.max_iterations is None or iterations < self.max_iterations):
+            self.iterate(code, symbol)
+            iterations += 1
+
+    def _parallelSearch(self, code, symbol):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        options = dict(c=self.c, rollout_batch=self.rollout_batch, max_iterations=self.max_iterations)
+        jobs = [(self.table, code, symbol, self.time_budget, np.random.randint(2 ** 31), options)
+                for _ in range(self.workers)]
+        base = self.table
+        merged = {k: list(v) for k, v in base.items()}
+        for table, iterations in self.pool.map(searchWorker, jobs):
+            self.iterations += iterations
+            for k, (visits, total) in table.items():
+                old_visits, old_total = base.get(k, (0, 0.0))
+                stats = merged.setdefault(k, [0, 0.0])
+                stats[0] += visits - old_visits
+                stats[1] += total - old_total
+        self.table = merged
+
+    def prune(self, code):
+        # positions with fewer stones than the current board cannot come up again
+        stones = STONES[code]
+        self.table = {k: v for k, v in self.table.items() if STONES[k] >= stones}
+
+    def chooseAction(self, positions, current_board, symbol):
+        code = boardCode(current_board)
+        self.prune(code)
+        if self.workers > 1:
+            self._parallelSearch(code, symbol)
+        else:
+            self.search(code, symbol)
+
+        # most visited move
+        cells = [p[0] * BOARD_COLS + p[1] for p in positions]
+        keys = CANONICAL[code + (symbol % 3) * POW3[cells]].tolist()
+        visits = [self.table.get(k, [0, 0.0])[0] for k in keys]
+        return positions[int(np.argmax(visits))]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    # append a hash state
+    def addState(self, state):
+        pass
+
+    # at the end of game, backpropagate and update states value
+    def feedReward(self, reward):
+        pass
+
+    def reset(self):
+        pass
+
+
+if __name__ == "__main__":
+    # MCTS against a trained player, no learning on either side
+    p1 = MCTSPlayer("mcts", time_budget=0.05)
+    p2 = Player("p2", exp_rate=0)
+    p2.loadPolicy("policy_p2")
+
+    results = []
+    for _ in range(20):
+        st = State(p1, p2)
+        while st.winner() is None:
+            player = p1 if st.playerSymbol == 1 else p2
+            st.updateState(player.chooseAction(st.availablePositions(), st.board, st.playerSymbol))
+        results.append(st.winner())
+    print("mcts wins {} | ties {} | losses {}".format(results.count(1), results.count(0), results.count(-1)))
+
+    # play with human
+    p1 = MCTSPlayer("computer", time_budget=0.5)
+    p2 = HumanPlayer("human")
+    st = State(p1, p2)
+    st.play2()
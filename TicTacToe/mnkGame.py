@@ -0,0 +1,281 @@
+import numpy as np
+from ticTacToe import Player, HumanPlayer
+
+MASK64 = (1 << 64) - 1
+
+
+class BitBoard:
+    """
+    geometry of an m x n board with k-in-a-row, each player's stones are kept as an integer bitboard
+    with bit r * cols + c set for an occupied cell
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # every line of k cells, and for each cell the lines passing through it
+        self.win_masks = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        self.win_masks.append(sum(1 << ((r + dr * i) * cols + c + dc * i) for i in range(k)))
+        self.cell_masks = [[m for m in self.win_masks if m >> i & 1] for i in range(self.cells)]
+
+    def isWin(self, bits, cell):
+        # only lines through the last move can have been completed
+        for m in self.cell_masks[cell]:
+            if bits & m == m:
+                return True
+        return False
+
+    def moves(self, x, o):
+        free = self.full & ~(x | o)
+        cells = []
+        while free:
+            low = free & -free
+            cells.append(low.bit_length() - 1)
+            free ^= low
+        return cells
+
+    def position(self, cell):
+        return cell // self.cols, cell % self.cols
+
+    def cell(self, position):
+        return position[0] * self.cols + position[1]
+
+
+class HashedValueStore:
+    """
+    bounded value table for boards too large to enumerate, an open-addressing hash table of fixed capacity
+    keys are hashed to a 64-bit fingerprint; when all probe slots are taken the home slot is overwritten,
+    so memory never grows past capacity at the cost of forgetting some states
+    """
+
+    def __init__(self, capacity=2 ** 20, probes=4):
+        self.bits = max(1, int(np.ceil(np.log2(capacity))))
+        self.capacity = 1 << self.bits
+        self.probes = probes
+        self.fingerprints = np.zeros(self.capacity, dtype=np.uint64)  # 0 marks an empty slot
+        self.values = np.zeros(self.capacity, dtype=np.float32)
+        self.size = 0
+        self.replacements = 0
+
+    def _hash(self, key):
+        h = 0
+        while True:
+            h = ((h ^ (key & MASK64)) * 0x9E3779B97F4A7C15) & MASK64
+            h ^= h >> 29
+            key >>= 64
+            if not key:
+                return h | 1
+
+    def _find(self, key):
+        fp = self._hash(key)
+        home = fp >> (64 - self.bits)
+        for i in range(self.probes):
+            slot = (home + i) & (self.capacity - 1)
+            stored = int(self.fingerprints[slot])
+            if stored == fp or stored == 0:
+                return slot, fp, stored == fp
+        return home, fp, False
+
+    def get(self, key, default=None):
+        slot, _, found = self._find(key)
+        return float(self.values[slot]) if found else default
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        slot, fp, found = self._find(key)
+        if not found:
+            if self.fingerprints[slot] == 0:
+                self.size += 1
+            else:
+                self.replacements += 1
+            self.fingerprints[slot] = fp
+        self.values[slot] = value
+
+    def __contains__(self, key):
+        return self._find(key)[2]
+
+    def __len__(self):
+        return self.size
+
+    def save(self, file):
+        np.savez(file, fingerprints=self.fingerprints, values=self.values, probes=self.probes)
+
+    @classmethod
+    def load(cls, file):
+        data = np.load(file)
+        store = cls(len(data['fingerprints']), int(data['probes']))
+        store.fingerprints = data['fingerprints']
+        store.values = data['values']
+        store.size = int(np.count_nonzero(store.fingerprints))
+        return store
+
+
+class MNKPlayer(Player):
+    """
+    tabular Player for a BitBoard game, chooseAction receives the (x, o) bitboards instead of a numpy board
+    and states are keyed by the integer (x << cells) | o
+    """
+
+    def __init__(self, name, geometry, exp_rate=0.3, capacity=2 ** 20):
+        Player.__init__(self, name, exp_rate)
+        self.geometry = geometry
+        self.states_value = HashedValueStore(capacity)
+
+    def getHash(self, board):
+        x, o = board
+        return (x << self.geometry.cells) | o
+
+    def chooseAction(self, positions, current_board, symbol):
+        if np.random.uniform(0, 1) <= self.exp_rate:
+            # take random action
+            idx = np.random.choice(len(positions))
+            action = positions[idx]
+        else:
+            key = self.getHash(current_board)
+            shift = self.geometry.cells if symbol == 1 else 0
+            value_max = -999
+            for p in positions:
+                value = self.states_value.get(key | (1 << (self.geometry.cell(p) + shift)), 0)
+                if value >= value_max:
+                    value_max = value
+                    action = p
+        return action
+
+    def savePolicy(self):
+        self.states_value.save('policy_' + str(self.name) + '.npz')
+
+    def loadPolicy(self, file):
+        self.states_value = HashedValueStore.load(file)
+
+
+class MNKState:
+    # m x n, k-in-a-row game with the same play/play2 flow as ticTacToe.State
+    def __init__(self, p1, p2, rows=3, cols=3, k=3):
+        self.geometry = BitBoard(rows, cols, k)
+        self.p1 = p1
+        self.p2 = p2
+        self.reset()
+
+    def getHash(self):
+        self.boardHash = (self.x << self.geometry.cells) | self.o
+        return self.boardHash
+
+    def availablePositions(self):
+        return [self.geometry.position(c) for c in self.geometry.moves(self.x, self.o)]
+
+    def updateState(self, position):
+        cell = self.geometry.cell(position)
+        if self.playerSymbol == 1:
+            self.x |= 1 << cell
+            won = self.geometry.isWin(self.x, cell)
+        else:
+            self.o |= 1 << cell
+            won = self.geometry.isWin(self.o, cell)
+        if won:
+            self.result = self.playerSymbol
+        elif (self.x | self.o) == self.geometry.full:
+            self.result = 0
+        self.isEnd = self.result is not None
+        # switch to another player
+        self.playerSymbol = -self.playerSymbol
+
+    def winner(self):
+        return self.result
+
+    # only when game ends
+    def giveReward(self):
+        if self.result == 1:
+            self.p1.feedReward(1)
+            self.p2.feedReward(0)
+        elif self.result == -1:
+            self.p1.feedReward(0)
+            self.p2.feedReward(1)
+        else:
+            self.p1.feedReward(0.1)
+            self.p2.feedReward(0.5)
+
+    def reset(self):
+        self.x = 0
+        self.o = 0
+        self.boardHash = None
+        self.isEnd = False
+        self.result = None
+        self.playerSymbol = 1
+
+    def play(self, rounds=100):
+        for i in range(rounds):
+            if i % 1000 == 0:
+                print("Rounds {}".format(i))
+            while not self.isEnd:
+                player = self.p1 if self.playerSymbol == 1 else self.p2
+                action = player.chooseAction(self.availablePositions(), (self.x, self.o), self.playerSymbol)
+                self.updateState(action)
+                player.addState(self.getHash())
+            self.giveReward()
+            self.p1.reset()
+            self.p2.reset()
+            self.reset()
+
+    # play with human
+    def play2(self):
+        while not self.isEnd:
+            if self.playerSymbol == 1:
+                action = self.p1.chooseAction(self.availablePositions(), (self.x, self.o), self.playerSymbol)
+            else:
+                action = self.p2.chooseAction(self.availablePositions())
+            self.updateState(action)
+            self.showBoard()
+        if self.result == 1:
+            print(self.p1.name, "wins!")
+        elif self.result == -1:
+            print(self.p2.name, "wins!")
+        else:
+            print("tie!")
+        self.reset()
+
+    def showBoard(self):
+        # p1: x  p2: o
+        line = '-' * (4 * self.geometry.cols + 1)
+        for i in range(self.geometry.rows):
+            print(line)
+            out = '| '
+            for j in range(self.geometry.cols):
+                bit = 1 << self.geometry.cell((i, j))
+                token = 'x' if self.x & bit else 'o' if self.o & bit else ' '
+                out += token + ' | '
+            print(out)
+        print(line)
+
+
+if __name__ == "__main__":
+    # training on 4x4, 3-in-a-row
+    geometry = BitBoard(4, 4, 3)
+    p1 = MNKPlayer("p1", geometry)
+    p2 = MNKPlayer("p2", geometry)
+
+    st = MNKState(p1, p2, 4, 4, 3)
+    print("training...")
+    st.play(50000)
+    p1.savePolicy()
+
+    # play with human
+    p1 = MNKPlayer("computer", geometry, exp_rate=0)
+    p1.loadPolicy("policy_p1.npz")
+    p2 = HumanPlayer("human")
+
+    st = MNKState(p1, p2, 4, 4, 3)
+    st.play2()
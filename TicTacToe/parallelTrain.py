@@ -0,0 +1,89 @@
+import time
+import numpy as np
+from multiprocessing import Pool, cpu_count
+from ticTacToe import State, Player
+
+
+class CountingPlayer(Player):
+    # Player that also counts how many backups each state received, used as merge weights
+    def __init__(self, name, exp_rate=0.3):
+        Player.__init__(self, name, exp_rate)
+        self.visits = {}
+
+    def feedReward(self, reward):
+        for st in self.states:
+            self.visits[st] = self.visits.get(st, 0) + 1
+        Player.feedReward(self, reward)
+
+
+def playShard(args):
+    # one self-play shard, started from the master tables
+    seed, rounds, exp_rates, tables = args
+    np.random.seed(seed)
+    players = []
+    for name, exp_rate, table in zip(["p1", "p2"], exp_rates, tables):
+        p = CountingPlayer(name, exp_rate)
+        p.states_value = dict(table)
+        players.append(p)
+    State(players[0], players[1]).play(rounds)
+    return [(p.states_value, p.visits) for p in players]
+
+
+def mergeTables(master, shards):
+    # visit-weighted average of the shard values, states no shard visited keep the master value
+    total = {}
+    weight = {}
+    for values, visits in shards:
+        for st, n in visits.items():
+            total[st] = total.get(st, 0) + n * values[st]
+            weight[st] = weight.get(st, 0) + n
+    merged = dict(master)
+    for st, n in weight.items():
+        merged[st] = total[st] / n
+    return merged
+
+
+class ParallelTrainer:
+    """
+    runs independently seeded State.play shards in a process pool, every round the shard tables
+    are merged into p1/p2 states_value and sent back out as the starting point of the next round
+    """
+
+    def __init__(self, p1, p2, workers=None, seed=0):
+        self.p1 = p1
+        self.p2 = p2
+        self.workers = cpu_count() if workers is None else workers
+        self.seed = seed
+        self.merge_times = []  # seconds spent merging, per round
+        self.games_per_sec = []
+
+    def train(self, rounds=10, games_per_shard=1000):
+        with Pool(self.workers) as pool:
+            for r in range(rounds):
+                start = time.time()
+                tables = [self.p1.states_value, self.p2.states_value]
+                exp_rates = [self.p1.exp_rate, self.p2.exp_rate]
+                jobs = [(self.seed + r * self.workers + i, games_per_shard, exp_rates, tables)
+                        for i in range(self.workers)]
+                results = pool.map(playShard, jobs)
+
+                merge_start = time.time()
+                self.p1.states_value = mergeTables(self.p1.states_value, [res[0] for res in results])
+                self.p2.states_value = mergeTables(self.p2.states_value, [res[1] for res in results])
+                end = time.time()
+
+                self.merge_times.append(end - merge_start)
+                self.games_per_sec.append(self.workers * games_per_shard / (end - start))
+                print("round {} | {:.0f} games/sec | merge {:.1f} ms".format(
+                    r, self.games_per_sec[-1], 1000 * self.merge_times[-1]))
+
+
+if __name__ == "__main__":
+    p1 = Player("p1")
+    p2 = Player("p2")
+
+    trainer = ParallelTrainer(p1, p2)
+    print("training...")
+    trainer.train(rounds=10, games_per_shard=5000)
+    p1.savePolicy()
+    p2.savePolicy()
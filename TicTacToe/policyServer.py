@@ -0,0 +1,206 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import deque
+import numpy as np
+from ticTacToe import Player, PolicyTable, BOARD_CELLS, BOARD_COLS, POW3, CODE_DIGITS, CANONICAL, TERMINAL, \
+    LEGAL_MOVES, MASK_POSITIONS
+
+
+class PolicyServer:
+    """
+    answers board -> move requests for a saved policy over a local socket, one JSON object per line
+    request: {"board": [9 cells of 0/1/-1], "symbol": 1 or -1}  (symbol defaults to the side to move)
+    reply:   {"move": [row, col]}, or {"error": message}
+    {"stats": true} returns the latency counters
+    concurrent requests are collected into micro-batches and answered with one vectorized lookup
+    """
+
+    def __init__(self, policy_file, max_batch=256, max_delay=0.0005, window=10000):
+        player = Player("server", exp_rate=0)
+        player.loadPolicy(policy_file)
+        table = player.states_value
+        if not isinstance(table, PolicyTable):
+            table = PolicyTable.fromDict(table)
+        self.values = np.nan_to_num(np.asarray(table.values, dtype=np.float64))
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.latencies = deque(maxlen=window)  # seconds, most recent requests
+        self.requests = 0
+        self.batches = 0
+        self.queue = None
+        self.server = None
+        self.connections = set()  # handler tasks of open connections
+
+    def chooseMoves(self, codes, symbols):
+        # greedy afterstate move for every board at once, ties broken like Player.chooseAction
+        candidates = codes[:, None] + (symbols % 3)[:, None] * POW3
+        legal = CODE_DIGITS[codes] == 0
+        values = np.where(legal, self.values[CANONICAL[np.where(legal, candidates, 0)]], -np.inf)
+        return BOARD_CELLS - 1 - np.argmax(values[:, ::-1], axis=1)
+
+    async def batcher(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.max_delay:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            codes = np.array([b[0] for b in batch])
+            symbols = np.array([b[1] for b in batch])
+            cells = self.chooseMoves(codes, symbols)
+            self.batches += 1
+            now = time.perf_counter()
+            for (_, _, future, start), cell in zip(batch, cells.tolist()):
+                self.latencies.append(now - start)
+                if not future.done():
+                    future.set_result(cell)
+
+    def parse(self, request):
+        board = np.asarray(request["board"], dtype=float).reshape(BOARD_CELLS)
+        if not np.isin(board, [0, 1, -1]).all():
+            raise ValueError("cells must be 0, 1 or -1")
+        board = board.astype(int)
+        code = int(np.dot(board % 3, POW3))
+        if TERMINAL[code]:
+            raise ValueError("game is over")
+        symbol = request.get("symbol")
+        if symbol is None:
+            symbol = 1 if np.sum(board == 1) == np.sum(board == -1) else -1
+        if symbol not in (1, -1):
+            raise ValueError("symbol must be 1 or -1")
+        return code, int(symbol)
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    if request.get("stats"):
+                        reply = self.stats()
+                    else:
+                        code, symbol = self.parse(request)
+                        future = loop.create_future()
+                        self.requests += 1
+                        await self.queue.put((code, symbol, future, start))
+                        cell = await future
+                        reply = {"move": [cell // BOARD_COLS, cell % BOARD_COLS]}
+                except (ValueError, KeyError, TypeError, OverflowError) as e:
+                    reply = {"error": str(e)}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+            self.connections.discard(task)
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0, 0)
+        return {"requests": self.requests, "batches": self.batches,
+                "mean_batch": self.requests / max(self.batches, 1), "p50_ms": p50, "p99_ms": p99}
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        # serve on a unix socket when path is given, else on a local TCP port
+        self.queue = asyncio.Queue()
+        self.batch_task = asyncio.ensure_future(self.batcher())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def stop(self):
+        self.server.close()
+        # connections closed by their clients finish on their own, the rest are cancelled
+        if self.connections:
+            _, pending = await asyncio.wait(list(self.connections), timeout=1)
+            for task in pending:
+                task.cancel()
+        await self.server.wait_closed()
+        self.batch_task.cancel()
+
+
+def randomBoards(n, seed=0):
+    # non-terminal boards reached by random play, for load testing
+    rng = np.random.RandomState(seed)
+    boards = []
+    while len(boards) < n:
+        code, symbol = 0, 1
+        for _ in range(rng.randint(0, BOARD_CELLS)):
+            positions = MASK_POSITIONS[LEGAL_MOVES[code]]
+            row, col = positions[rng.randint(len(positions))]
+            nxt = code + (symbol % 3) * int(POW3[row * BOARD_COLS + col])
+            if TERMINAL[nxt]:
+                break
+            code, symbol = nxt, -symbol
+        digits = CODE_DIGITS[code]
+        boards.append(np.where(digits == 2, -1, digits).tolist())
+    return boards
+
+
+async def loadTest(host="127.0.0.1", port=8765, path=None, clients=32, requests=200):
+    """
+    local load generator, each client keeps one connection and sends requests back to back
+    returns client side latencies (ms) and the server's own counters
+    """
+    boards = randomBoards(requests)
+
+    async def connect():
+        if path is not None:
+            return await asyncio.open_unix_connection(path)
+        return await asyncio.open_connection(host, port)
+
+    async def client():
+        reader, writer = await connect()
+        latencies = []
+        for board in boards:
+            start = time.perf_counter()
+            writer.write((json.dumps({"board": board}) + "\n").encode())
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            assert "move" in reply, reply
+            latencies.append(1000 * (time.perf_counter() - start))
+        writer.close()
+        await writer.wait_closed()
+        return latencies
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[client() for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await connect()
+    writer.write(b'{"stats": true}\n')
+    stats = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+
+    latencies = np.concatenate(results)
+    print("{} requests in {:.2f}s ({:.0f}/sec) | client p50 {:.2f} ms p99 {:.2f} ms".format(
+        len(latencies), elapsed, len(latencies) / elapsed, *np.percentile(latencies, [50, 99])))
+    print("server", stats)
+    return latencies, stats
+
+
+async def main(policy_file):
+    path = os.path.join(tempfile.mkdtemp(), "policy.sock")
+    server = PolicyServer(policy_file)
+    await server.start(path=path)
+    await loadTest(path=path)
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main("policy_p1"))
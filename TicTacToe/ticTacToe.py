@@ -1,8 +1,150 @@
 import numpy as np
 import pickle
+import struct
 
 BOARD_ROWS = 3
 BOARD_COLS = 3
+BOARD_CELLS = BOARD_ROWS * BOARD_COLS
+
+# base-3 encoding of a board: cell i contributes digit * 3^i, digit 0 empty, 1 for p1, 2 for p2
+POW3 = 3 ** np.arange(BOARD_CELLS)
+N_CODES = 3 ** BOARD_CELLS
+# the 8 rotations/reflections of the board, as cell permutations
+_cells = np.arange(BOARD_CELLS).reshape(BOARD_ROWS, BOARD_COLS)
+SYMMETRIES = np.array([np.rot90(b, k).reshape(BOARD_CELLS) for b in (_cells, _cells.T) for k in range(4)])
+# digits of every code, and the smallest code among its symmetric images
+CODE_DIGITS = (np.arange(N_CODES)[:, None] // POW3) % 3
+CANONICAL = np.min(CODE_DIGITS[:, SYMMETRIES] @ POW3, axis=1)
+
+# outcome of every code, computed once: winner (1, -1, or 0 for tie/not ended), terminal flag
+# and bitmask of empty cells (bit i set if cell i is free)
+_values = np.where(CODE_DIGITS == 2, -1, CODE_DIGITS)
+LINES = np.array([_cells[i, :] for i in range(BOARD_ROWS)] + [_cells[:, j] for j in range(BOARD_COLS)] +
+                 [np.diag(_cells), np.diag(np.fliplr(_cells))])
+_line_sums = _values[:, LINES].sum(axis=2)
+WINNER = np.where((_line_sums == 3).any(axis=1), 1, np.where((_line_sums == -3).any(axis=1), -1, 0)).astype(np.int8)
+LEGAL_MOVES = ((CODE_DIGITS == 0) @ (1 << np.arange(BOARD_CELLS))).astype(np.int16)
+TERMINAL = (WINNER != 0) | (LEGAL_MOVES == 0)
+# bitmask -> list of (row, col) positions
+MASK_POSITIONS = [[(i // BOARD_COLS, i % BOARD_COLS) for i in range(BOARD_CELLS) if m >> i & 1]
+                  for m in range(1 << BOARD_CELLS)]
+
+
+def boardCode(board):
+    # board of 0/1/-1 -> base-3 integer code (not symmetry folded)
+    return int(np.dot(board.reshape(BOARD_CELLS).astype(int) % 3, POW3))
+
+
+# MOVE_DELTA[symbol][cell]: change in board code when symbol is played on cell (index -1 is p2)
+MOVE_DELTA = np.array([np.zeros(BOARD_CELLS, dtype=int), POW3, 2 * POW3])
+
+
+def afterstateKeys(code, cells, symbol):
+    # canonical keys of the boards reached by playing symbol on each of cells, without building the boards
+    return CANONICAL[code + MOVE_DELTA[symbol][cells]]
+
+
+def canonicalHash(board):
+    # same key for all 8 symmetric images of a board
+    return int(CANONICAL[boardCode(board)])
+
+
+def convertPolicy(states_value):
+    """
+    convert a value table keyed by the old str(board) hashes into canonical integer keys,
+    symmetric positions learned separately are merged by averaging their values
+    """
+    merged = {}
+    for key, value in states_value.items():
+        if not isinstance(key, str):
+            merged.setdefault(key, []).append(value)
+            continue
+        board = np.array(key.strip('[]').split(), dtype=float)
+        merged.setdefault(canonicalHash(board), []).append(value)
+    return {k: float(np.mean(v)) for k, v in merged.items()}
+
+
+# policy file: 16 byte header (magic, version, number of codes) followed by float32 values indexed by code
+POLICY_MAGIC = b'TTTPOLCY'
+POLICY_VERSION = 1
+POLICY_HEADER = struct.Struct('<8sII')
+
+
+class PolicyTable:
+    """
+    states_value backed by a dense float32 array indexed by canonical board code, NaN marks unseen states
+    behaves like the dict it replaces; when loaded from a policy file the array is a copy-on-write memmap,
+    so processes reading the same file share its pages
+    """
+
+    def __init__(self, values=None):
+        if values is None:
+            values = np.full(N_CODES, np.nan, dtype=np.float32)
+        self.values = values
+
+    @classmethod
+    def fromDict(cls, states_value):
+        table = cls()
+        table.update(states_value)
+        return table
+
+    def _keys(self):
+        return np.nonzero(~np.isnan(self.values))[0]
+
+    def lookup(self, keys):
+        # values of many keys at once, unseen states count as 0
+        return np.nan_to_num(self.values[keys])
+
+    def get(self, key, default=None):
+        value = self.values[key]
+        return default if np.isnan(value) else float(value)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.values[key] = value
+
+    def __contains__(self, key):
+        return not np.isnan(self.values[key])
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __iter__(self):
+        return iter(self._keys().tolist())
+
+    def keys(self):
+        return self._keys().tolist()
+
+    def items(self):
+        keys = self._keys()
+        return zip(keys.tolist(), self.values[keys].tolist())
+
+    def update(self, other):
+        for k, v in dict(other).items():
+            self.values[k] = v
+
+    def save(self, file):
+        with open(file, 'wb') as fw:
+            fw.write(POLICY_HEADER.pack(POLICY_MAGIC, POLICY_VERSION, N_CODES))
+            fw.write(np.asarray(self.values, dtype=np.float32).tobytes())
+
+    @classmethod
+    def load(cls, file):
+        with open(file, 'rb') as fr:
+            magic, version, n_codes = POLICY_HEADER.unpack(fr.read(POLICY_HEADER.size))
+        if magic != POLICY_MAGIC or version != POLICY_VERSION or n_codes != N_CODES:
+            raise ValueError("{} is not a version {} policy file".format(file, POLICY_VERSION))
+        return cls(np.memmap(file, dtype=np.float32, mode='c', offset=POLICY_HEADER.size, shape=(n_codes,)))
+
+
+def isPolicyFile(file):
+    with open(file, 'rb') as fr:
+        return fr.read(len(POLICY_MAGIC)) == POLICY_MAGIC
 
 
 class State:
@@ -12,61 +154,29 @@ class State:
         self.p2 = p2
         self.isEnd = False
         self.boardHash = None
+        self.boardCode = 0  # base-3 code of board, kept in step with updateState
         # init p1 plays first
         self.playerSymbol = 1
 
-    # get unique hash of current board state
+    # get unique hash of current board state, shared by its rotations/reflections
     def getHash(self):
-        self.boardHash = str(self.board.reshape(BOARD_COLS * BOARD_ROWS))
+        self.boardHash = int(CANONICAL[self.boardCode])
         return self.boardHash
 
     def winner(self):
-        # row
-        for i in range(BOARD_ROWS):
-            if sum(self.board[i, :]) == 3:
-                self.isEnd = True
-                return 1
-            if sum(self.board[i, :]) == -3:
-                self.isEnd = True
-                return -1
-        # col
-        for i in range(BOARD_COLS):
-            if sum(self.board[:, i]) == 3:
-                self.isEnd = True
-                return 1
-            if sum(self.board[:, i]) == -3:
-                self.isEnd = True
-                return -1
-        # diagonal
-        diag_sum1 = sum([self.board[i, i] for i in range(BOARD_COLS)])
-        diag_sum2 = sum([self.board[i, BOARD_COLS - i - 1] for i in range(BOARD_COLS)])
-        diag_sum = max(abs(diag_sum1), abs(diag_sum2))
-        if diag_sum == 3:
-            self.isEnd = True
-            if diag_sum1 == 3 or diag_sum2 == 3:
-                return 1
-            else:
-                return -1
-
-        # tie
-        # no available positions
-        if len(self.availablePositions()) == 0:
-            self.isEnd = True
-            return 0
-        # not end
-        self.isEnd = False
-        return None
+        # looked up from the precomputed outcome table
+        if not TERMINAL[self.boardCode]:
+            self.isEnd = False
+            return None
+        self.isEnd = True
+        return int(WINNER[self.boardCode])
 
     def availablePositions(self):
-        positions = []
-        for i in range(BOARD_ROWS):
-            for j in range(BOARD_COLS):
-                if self.board[i, j] == 0:
-                    positions.append((i, j))  # need to be tuple
-        return positions
+        return list(MASK_POSITIONS[LEGAL_MOVES[self.boardCode]])  # need to be tuple
 
     def updateState(self, position):
         self.board[position] = self.playerSymbol
+        self.boardCode += (self.playerSymbol % 3) * int(POW3[position[0] * BOARD_COLS + position[1]])
         # switch to another player
         self.playerSymbol = -1 if self.playerSymbol == 1 else 1
 
@@ -88,6 +198,7 @@ class State:
     def reset(self):
         self.board = np.zeros((BOARD_ROWS, BOARD_COLS))
         self.boardHash = None
+        self.boardCode = 0
         self.isEnd = False
         self.playerSymbol = 1
 
@@ -195,7 +306,7 @@ class Player:
         self.states_value = {}  # state -> value
 
     def getHash(self, board):
-        boardHash = str(board.reshape(BOARD_COLS * BOARD_ROWS))
+        boardHash = canonicalHash(board)
         return boardHash
 
     def chooseAction(self, positions, current_board, symbol):
@@ -204,19 +315,20 @@ class Player:
             idx = np.random.choice(len(positions))
             action = positions[idx]
         else:
-            value_max = -999
-            for p in positions:
-                next_board = current_board.copy()
-                next_board[p] = symbol
-                next_boardHash = self.getHash(next_board)
-                value = 0 if self.states_value.get(next_boardHash) is None else self.states_value.get(next_boardHash)
-                # print("value", value)
-                if value >= value_max:
-                    value_max = value
-                    action = p
+            cells = [p[0] * BOARD_COLS + p[1] for p in positions]
+            values = self.stateValues(afterstateKeys(boardCode(current_board), cells, symbol))
+            # last of equal maxima, as when scanning positions with >=
+            action = positions[len(positions) - 1 - np.argmax(values[::-1])]
         # print("{} takes action {}".format(self.name, action))
         return action
 
+    # values of a batch of state keys, unseen states count as 0
+    def stateValues(self, keys):
+        if isinstance(self.states_value, PolicyTable):
+            return self.states_value.lookup(keys)
+        get = self.states_value.get
+        return np.array([get(k, 0) for k in keys.tolist()])
+
     # append a hash state
     def addState(self, state):
         self.states.append(state)
@@ -233,14 +345,22 @@ class Player:
         self.states = []
 
     def savePolicy(self):
-        fw = open('policy_' + str(self.name), 'wb')
-        pickle.dump(self.states_value, fw)
-        fw.close()
+        table = self.states_value
+        if not isinstance(table, PolicyTable):
+            table = PolicyTable.fromDict(table)
+        table.save('policy_' + str(self.name))
 
     def loadPolicy(self, file):
+        if isPolicyFile(file):
+            self.states_value = PolicyTable.load(file)
+            return
+        # older pickled dict policies
         fr = open(file, 'rb')
         self.states_value = pickle.load(fr)
         fr.close()
+        # policies saved before canonical keys were keyed by str(board)
+        if any(isinstance(k, str) for k in self.states_value):
+            self.states_value = convertPolicy(self.states_value)
 
 
 class HumanPlayer:
@@ -0,0 +1,149 @@
+import numpy as np
+from ticTacToe import Player, BOARD_ROWS, BOARD_COLS, POW3, CODE_DIGITS, CANONICAL, WINNER, TERMINAL, \
+    LEGAL_MOVES, MASK_POSITIONS
+
+# transposition table flags
+EXACT, LOWER, UPPER = 0, 1, 2
+# digit of the side to move: p1 (1) when both have played as often, else p2 (2)
+TO_MOVE = np.where((CODE_DIGITS == 1).sum(axis=1) == (CODE_DIGITS == 2).sum(axis=1), 1, 2)
+
+
+def codeToBoard(code):
+    digits = CODE_DIGITS[code]
+    return np.where(digits == 2, -1, digits).reshape(BOARD_ROWS, BOARD_COLS).astype(float)
+
+
+class Solver:
+    """
+    negamax with alpha-beta over base-3 board codes, values are from the side to move: 1 win, 0 draw, -1 loss
+    the transposition table is keyed by canonical code, so symmetric positions are searched once
+    """
+
+    def __init__(self):
+        self.table = {}  # canonical code -> (value, flag)
+        self.nodes = 0
+
+    def negamax(self, code, alpha=-1, beta=1):
+        self.nodes += 1
+        if TERMINAL[code]:
+            # a winner can only be the player who just moved
+            return -abs(int(WINNER[code]))
+
+        key = int(CANONICAL[code])
+        entry = self.table.get(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        alpha_orig = alpha
+        digit = TO_MOVE[code]
+        best = -2
+        for cell in self.children(code):
+            value = -self.negamax(code + digit * int(POW3[cell]), -beta, -alpha)
+            best = max(best, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (best, flag)
+        return best
+
+    @staticmethod
+    def children(code):
+        mask = int(LEGAL_MOVES[code])
+        return [i for i in range(len(POW3)) if mask >> i & 1]
+
+    def value(self, code):
+        # a full window search gives the exact value
+        return self.negamax(code, -1, 1)
+
+    def moveValues(self, code):
+        # exact value of every legal move, from the side to move
+        digit = TO_MOVE[code]
+        return {cell: -self.value(code + digit * int(POW3[cell])) for cell in self.children(code)}
+
+    def reachable(self):
+        # canonical codes of every position reachable from the empty board
+        seen = set()
+        stack = [0]
+        while stack:
+            code = stack.pop()
+            key = int(CANONICAL[code])
+            if key in seen:
+                continue
+            seen.add(key)
+            if not TERMINAL[code]:
+                digit = TO_MOVE[code]
+                stack.extend(code + digit * int(POW3[cell]) for cell in self.children(code))
+        return sorted(seen)
+
+    def statesValue(self, symbol, draw=None):
+        """
+        exact afterstate values in Player's key format for the player playing symbol,
+        a won position is worth 1, a lost one 0 and a draw the reward State.giveReward pays for it
+        """
+        if draw is None:
+            draw = 0.1 if symbol == 1 else 0.5
+        mover = 1 if symbol == 1 else 2
+        states_value = {}
+        for code in self.reachable():
+            # afterstates of this player are those where the opponent is to move
+            if code == 0 or TO_MOVE[code] == mover:
+                continue
+            value = -self.value(code)
+            states_value[code] = 1 if value == 1 else 0 if value == -1 else draw
+        return states_value
+
+    def warmStart(self, player, symbol, draw=None):
+        player.states_value.update(self.statesValue(symbol, draw))
+
+    def policyError(self, player, symbol):
+        """
+        play player greedily in every reachable position where it is to move,
+        returns (number of suboptimal moves, number of positions)
+        """
+        exp_rate = player.exp_rate
+        player.exp_rate = 0
+        mover = 1 if symbol == 1 else 2
+        wrong, total = 0, 0
+        for code in self.reachable():
+            if TERMINAL[code] or TO_MOVE[code] != mover:
+                continue
+            values = self.moveValues(code)
+            positions = MASK_POSITIONS[LEGAL_MOVES[code]]
+            action = player.chooseAction(positions, codeToBoard(code), symbol)
+            total += 1
+            if values[action[0] * BOARD_COLS + action[1]] < max(values.values()):
+                wrong += 1
+        player.exp_rate = exp_rate
+        return wrong, total
+
+
+if __name__ == "__main__":
+    solver = Solver()
+    print("value of empty board", solver.value(0))
+    print("positions", len(solver.reachable()), "nodes searched", solver.nodes)
+
+    p1 = Player("p1")
+    p1.loadPolicy("policy_p1")
+    wrong, total = solver.policyError(p1, 1)
+    print("p1 policy: {} suboptimal moves out of {} positions".format(wrong, total))
+
+    # warm start a fresh player with the exact values
+    p1 = Player("p1")
+    solver.warmStart(p1, 1)
+    print("warm started with", len(p1.states_value), "states")
+    print("suboptimal moves", solver.policyError(p1, 1))
@@ -0,0 +1,157 @@
+import os
+import numpy as np
+from itertools import combinations
+from multiprocessing import Pool, cpu_count
+from ticTacToe import State, Player, CODE_DIGITS
+
+
+def playGame(first, second, random_openings=0):
+    # one game without learning, returns 1 if first wins, -1 if second wins, 0 for a tie
+    st = State(first, second)
+    players = [first, second]
+    moves = 0
+    while True:
+        positions = st.availablePositions()
+        if moves < random_openings:
+            action = positions[np.random.choice(len(positions))]
+        else:
+            action = players[moves % 2].chooseAction(positions, st.board, st.playerSymbol)
+        st.updateState(action)
+        moves += 1
+        win = st.winner()
+        if win is not None:
+            return win
+
+
+def policySide(states_value):
+    """
+    which symbol a policy has values for: 1 if it only holds afterstates of a move by p1 (one more 1 than -1
+    on the board), -1 if only afterstates of a move by p2, 0 if it holds both and can play either colour
+    """
+    digits = CODE_DIGITS[np.array(list(states_value.keys()), dtype=np.int64)]
+    mover_p1 = (digits == 1).sum(axis=1) > (digits == 2).sum(axis=1)
+    if mover_p1.all():
+        return 1
+    if not mover_p1.any():
+        return -1
+    return 0
+
+
+def orderings(side_a, side_b):
+    # who may move first in a game between policies of these sides: "a", "b" or both
+    out = []
+    if side_a != -1 and side_b != 1:
+        out.append("a")
+    if side_b != -1 and side_a != 1:
+        out.append("b")
+    return out
+
+
+def playMatch(args):
+    """
+    games between two saved policies, each only in a colour it was trained for: colours alternate every game
+    when both policies can play either side, otherwise the policy trained as p1 always moves first
+    returns (wins, draws, losses) of the first policy
+    """
+    file_a, file_b, games, exp_rate, random_openings, seed = args
+    np.random.seed(seed)
+    a = Player("a", exp_rate=exp_rate)
+    a.loadPolicy(file_a)
+    b = Player("b", exp_rate=exp_rate)
+    b.loadPolicy(file_b)
+    first = orderings(policySide(a.states_value), policySide(b.states_value))
+    if not first:
+        raise ValueError("{} and {} were trained for the same side".format(file_a, file_b))
+
+    wins, draws, losses = 0, 0, 0
+    for g in range(games):
+        if first[g % len(first)] == "a":
+            result = playGame(a, b, random_openings)
+        else:
+            result = -playGame(b, a, random_openings)
+        if result == 1:
+            wins += 1
+        elif result == -1:
+            losses += 1
+        else:
+            draws += 1
+    return wins, draws, losses
+
+
+def eloRatings(wins, draws, iterations=1000, prior=1, scheduled=None):
+    """
+    Bradley-Terry fit of the results by minorization-maximization, on the Elo scale with mean 0
+    wins[i, j] is the number of games i won against j, draws count half a win for each side;
+    prior adds that many virtual draws between every scheduled pair (scheduled[i, j], every pair by default)
+    so unbeaten or winless players stay finite; a player with no games stays at 0
+    """
+    n = len(wins)
+    scheduled = (1 - np.eye(n)) if scheduled is None else np.asarray(scheduled, dtype=float)
+    games = wins + wins.T + draws + prior * scheduled
+    score = (wins + 0.5 * draws + 0.5 * prior * scheduled).sum(axis=1)
+    played = games.sum(axis=1) > 0
+    gamma = np.ones(n)
+    for _ in range(iterations):
+        gamma[played] = score[played] / (games / (gamma[:, None] + gamma[None, :])).sum(axis=1)[played]
+        gamma /= np.exp(np.mean(np.log(gamma)))
+    return 400 * np.log10(gamma)
+
+
+class Tournament:
+    """
+    round robin between saved policy files, every pair plays `games` greedy games, each policy only in the
+    colour it was trained for (see playMatch); pairs trained for the same side do not meet
+    pairs are played in parallel across processes
+    since greedy play is deterministic, the first `random_openings` moves of each game are random
+    """
+
+    def __init__(self, policy_files, games=100, exp_rate=0, random_openings=1, workers=None, seed=0):
+        self.policy_files = policy_files
+        self.games = games
+        self.exp_rate = exp_rate
+        self.random_openings = random_openings
+        self.workers = cpu_count() if workers is None else workers
+        self.seed = seed
+
+        n = len(policy_files)
+        self.wins = np.zeros((n, n), dtype=int)
+        self.draws = np.zeros((n, n), dtype=int)
+        self.losses = np.zeros((n, n), dtype=int)
+        self.scheduled = np.zeros((n, n), dtype=bool)  # pairs that met, same-side pairs never do
+        self.elo = np.zeros(n)
+
+    def run(self):
+        sides = []
+        for file in self.policy_files:
+            player = Player("side")
+            player.loadPolicy(file)
+            sides.append(policySide(player.states_value))
+        pairs = [(i, j) for i, j in combinations(range(len(self.policy_files)), 2) if orderings(sides[i], sides[j])]
+        jobs = [(self.policy_files[i], self.policy_files[j], self.games, self.exp_rate, self.random_openings,
+                 self.seed + k) for k, (i, j) in enumerate(pairs)]
+        with Pool(self.workers) as pool:
+            results = pool.map(playMatch, jobs)
+
+        for (i, j), (w, d, l) in zip(pairs, results):
+            self.wins[i, j], self.draws[i, j], self.losses[i, j] = w, d, l
+            self.wins[j, i], self.draws[j, i], self.losses[j, i] = l, d, w
+            self.scheduled[i, j] = self.scheduled[j, i] = True
+        self.elo = eloRatings(self.wins, self.draws, scheduled=self.scheduled)
+        return self.elo
+
+    def show(self):
+        names = [os.path.basename(f) for f in self.policy_files]
+        width = max(len(name) for name in names) + 2
+        print("W/D/L".ljust(width) + "".join(name.ljust(width + 4) for name in names) + "Elo")
+        for i, name in enumerate(names):
+            out = name.ljust(width)
+            for j in range(len(names)):
+                cell = "-" if not self.scheduled[i, j] else "{}/{}/{}".format(self.wins[i, j], self.draws[i, j], self.losses[i, j])
+                out += cell.ljust(width + 4)
+            print(out + "{:.0f}".format(self.elo[i]))
+
+
+if __name__ == "__main__":
+    tournament = Tournament(["policy_p1", "policy_p2"], games=200)
+    tournament.run()
+    tournament.show()
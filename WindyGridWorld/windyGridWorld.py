@@ -1,12 +1,15 @@
 import numpy as np
+from TabularMDP import TabularMDP
 
 
 class State:
-    def __init__(self, state=(3, 0), rows=7, cols=10):
+    def __init__(self, state=(3, 0), rows=7, cols=10, stochastic=False):
         self.END_STATE = (3, 7)
         self.WIND = [0, 0, 0, 1, 1, 1, 2, 2, 1, 0]
         self.ROWS = 7
         self.COLS = 10
+        # stochastic wind: where there is wind it is one stronger or weaker a third of the time each
+        self.stochastic = stochastic
 
         self.state = state  # starting point
         self.isEnd = True if self.state == self.END_STATE else False
@@ -17,7 +20,7 @@ class State:
         else:
             return 0
 
-    def nxtPosition(self, action):
+    def nxtPosition(self, action, wind=None):
         """
         action: up, down, left, right
         ------------------
@@ -27,8 +30,14 @@ class State:
         ...|
         return next position on board based on wind strength of that column
         (according to the book, the number of steps shifted upward is based on the current state)
+        wind overrides the wind strength of the current column
         """
-        currentWindy = self.WIND[self.state[1]]
+        if wind is not None:
+            currentWindy = wind
+        else:
+            currentWindy = self.WIND[self.state[1]]
+            if self.stochastic and currentWindy:
+                currentWindy += np.random.choice([-1, 0, 1])
 
         if action == "up":
             nxtState = (self.state[0] - 1 - currentWindy, self.state[1])
@@ -39,12 +48,8 @@ class State:
         else:
             nxtState = (self.state[0] - currentWindy, self.state[1] + 1)
 
-        # if next state is legal
-        positionRow, positionCol = 0, 0
-        if (nxtState[0] >= 0) and (nxtState[0] <= (self.ROWS - 1)):
-            positionRow = nxtState[0]
-        else:
-            positonRow = self.state[0]
+        # moves and wind past the top or bottom stop at the edge row
+        positionRow = min(max(nxtState[0], 0), self.ROWS - 1)
 
         if (nxtState[1] >= 0) and (nxtState[1] <= (self.COLS - 1)):
             positionCol = nxtState[1]
@@ -73,9 +78,22 @@ class State:
         print('-----------------------------------------')
 
 
+def compileMDP():
+    # windy State dynamics as integer-id arrays
+    def transition(position, action):
+        nxt = State(state=position).nxtPosition(action)
+        return nxt, State(state=nxt).giveReward()
+
+    board = State()
+    positions = [(i, j) for i in range(board.ROWS) for j in range(board.COLS)]
+    return TabularMDP.compile(positions, ["up", "down", "left", "right"], transition,
+                              lambda p: p == board.END_STATE, (3, 0))
+
+
 class Agent:
 
-    def __init__(self, lr=0.2, exp_rate=0.3):
+    def __init__(self, lr=0.2, exp_rate=0.3, stochastic=False):
+        self.stochastic = stochastic
         self.END_STATE = (3, 7)
         self.START_STATE = (3, 0)
         self.ROWS = 7
@@ -83,7 +101,7 @@ class Agent:
 
         self.states = []  # record position and action taken at the position
         self.actions = ["up", "down", "left", "right"]
-        self.State = State()
+        self.State = State(stochastic=self.stochastic)
         self.lr = lr
         self.exp_rate = exp_rate
 
@@ -116,11 +134,11 @@ class Agent:
     def takeAction(self, action):
         position = self.State.nxtPosition(action)
         # update State
-        return State(state=position)
+        return State(state=position, stochastic=self.stochastic)
 
     def reset(self):
         self.states = []
-        self.State = State()
+        self.State = State(stochastic=self.stochastic)
 
     def play(self, rounds=10):
         i = 0
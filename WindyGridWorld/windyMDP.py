@@ -0,0 +1,87 @@
+import time
+import numpy as np
+from windyGridWorld import State, compileMDP
+
+
+class AliasSampler:
+    """
+    Walker's alias method for many discrete distributions over the same K outcomes,
+    one row per distribution; sample() draws one outcome for each requested row in a single vectorized call
+    """
+
+    def __init__(self, probs):
+        probs = np.asarray(probs, dtype=float)
+        n, k = probs.shape
+        self.k = k
+        self.prob = np.ones((n, k))
+        self.alias = np.tile(np.arange(k), (n, 1))
+        # Vose's construction, once per row
+        for i in range(n):
+            scaled = probs[i] / probs[i].sum() * k
+            small = [j for j in range(k) if scaled[j] < 1]
+            large = [j for j in range(k) if scaled[j] >= 1]
+            while small and large:
+                s, l = small.pop(), large.pop()
+                self.prob[i, s] = scaled[s]
+                self.alias[i, s] = l
+                scaled[l] -= 1 - scaled[s]
+                (small if scaled[l] < 1 else large).append(l)
+
+    def sample(self, rows, rng=np.random):
+        rows = np.asarray(rows)
+        column = rng.randint(self.k, size=rows.shape)
+        keep = rng.uniform(0, 1, rows.shape) < self.prob[rows, column]
+        return np.where(keep, column, self.alias[rows, column])
+
+
+class WindyMDP:
+    """
+    windy grid world compiled to integer ids: the deterministic next-state table from compileMDP,
+    or with stochastic=True the three wind outcomes (one weaker, as given, one stronger) of every
+    state-action pair, sampled with an AliasSampler
+    step() takes scalars or arrays of states and actions, so whole batches of agents move at once
+    """
+
+    def __init__(self, stochastic=False):
+        self.mdp = compileMDP()
+        self.stochastic = stochastic
+        self.n_states, self.n_actions = self.mdp.n_states, self.mdp.n_actions
+        self.terminal = self.mdp.terminal
+        self.start = self.mdp.start
+
+        # outcomes[s, a, k] and their probabilities, one distribution per (s, a)
+        board = State()
+        self.outcomes = np.repeat(self.mdp.next_state[:, :, None], 3, axis=2)
+        probs = np.tile([0., 1., 0.], (self.n_states * self.n_actions, 1))
+        if stochastic:
+            for s, position in enumerate(self.mdp.positions):
+                wind = board.WIND[position[1]]
+                if self.terminal[s] or not wind:
+                    continue
+                for a, action in enumerate(self.mdp.actions):
+                    for k, w in enumerate([wind - 1, wind, wind + 1]):
+                        nxt = State(state=position).nxtPosition(action, wind=w)
+                        self.outcomes[s, a, k] = self.mdp.index[nxt]
+                    probs[s * self.n_actions + a] = 1 / 3
+        self.reward = np.array([State(state=p).giveReward() for p in self.mdp.positions], dtype=float)
+        self.sampler = AliasSampler(probs)
+
+    def step(self, s, a, rng=np.random):
+        if self.stochastic:
+            k = self.sampler.sample(np.asarray(s) * self.n_actions + a, rng)
+            nxt = self.outcomes[s, a, k]
+        else:
+            nxt = self.mdp.next_state[s, a]
+        return nxt, self.reward[nxt], self.terminal[nxt]
+
+
+if __name__ == "__main__":
+    n = 1000000
+    rng = np.random.RandomState(0)
+    for stochastic in [False, True]:
+        mdp = WindyMDP(stochastic)
+        s = rng.randint(mdp.n_states, size=n)
+        a = rng.randint(mdp.n_actions, size=n)
+        start = time.time()
+        mdp.step(s, a, rng)
+        print("stochastic={} | {:.0f} steps/sec".format(stochastic, n / (time.time() - start)))